@@ -1,9 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import json
+import math
 import os
-from lead_extractor import extract_leads
-from people_extractor import extract_linkedin_profiles
+import sys
+import threading
+import time
 
 # Load environment variables from .env file in development
 try:
@@ -14,15 +16,199 @@ except ImportError:
     # This is fine for production environments like Vercel
     pass
 
+# The extractors, job queue and lead store are imported inside the routes that
+# use them, so a cold start (and /api/health) doesn't pay for loading them.
+from streaming import choose_format, stream_events, stream_headers
+from paths import get_exports_dir
+from export_writer import check_export_format, convert_export
+import downloads
+from area_search import MAX_TILES, count_tiles, polygon_bounds
+from coalesce import get_single_flight, request_key
+from logging_config import get_logger
+import metrics
+from profiling import RequestProfile, profiling_requested
+from rate_limit import QuotaExceededError
+
 app = Flask(__name__)
+logger = get_logger(__name__)
 
 # Enhanced CORS configuration
 CORS(app, 
      origins=['*'],
      methods=['GET', 'POST', 'OPTIONS'],
-     allow_headers=['Content-Type', 'Accept', 'Authorization'],
+     # X-Admin-Token opts a request in to profiling (see profiling.py)
+     allow_headers=['Content-Type', 'Accept', 'Authorization', 'X-Admin-Token'],
+     expose_headers=['X-Profile-Dump'],
      supports_credentials=False)
 
+# Per-route latency and in-flight gauges for /api/metrics (the route template,
+# not the URL, so file names don't create new series)
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    metrics.request_started(g.metrics_route)
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_started' in g:
+        metrics.request_finished(g.metrics_route, time.perf_counter() - g.metrics_started)
+
+# Opt-in profiling: ?profile=1 with X-Admin-Token set to PROFILE_ADMIN_TOKEN adds a
+# stage breakdown to JSON responses and writes the full profile under <exports>/profiles
+@app.before_request
+def start_profile():
+    if profiling_requested(request.headers, request.args):
+        g.profile = RequestProfile(g.metrics_route)
+        g.profile.start()
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.stop()
+    summary = profile.summary()
+    if summary['dump']:
+        response.headers['X-Profile-Dump'] = summary['dump']
+    if response.is_json and not response.is_streamed:
+        body = response.get_json()
+        if isinstance(body, dict):
+            body['profile'] = summary
+            response.set_data(json.dumps(body))
+    return response
+
+def parse_export_format(data):
+    """Optional `export_format` shared by the extraction payloads. Returns (format, error_message)."""
+    export_format = data.get('export_format')
+    if export_format is None:
+        return None, None
+    return export_format, check_export_format(export_format)
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def parse_lead_request(data):
+    """Validate an extract-leads payload. Returns (kwargs, error_message)."""
+    if not data:
+        return None, 'No data provided'
+    
+    keywords = data.get('keywords', '').strip()
+    location = data.get('location', '').strip()
+    category = data.get('category', '')
+    bounds = data.get('bounds')
+    polygon = data.get('polygon')
+    tile_radius = data.get('tile_radius', 500)
+    
+    if not keywords or not location:
+        return None, 'Keywords and location are required'
+    
+    # Optional tiled area search
+    if bounds is not None and (
+            not isinstance(bounds, dict) or
+            any(not is_number(bounds.get(k)) for k in ('south', 'west', 'north', 'east'))):
+        return None, 'bounds must have numeric south, west, north and east'
+    if bounds is not None and not (-90 <= bounds['south'] <= bounds['north'] <= 90 and
+                                   -180 <= bounds['west'] <= bounds['east'] <= 180):
+        return None, 'bounds must have south <= north and west <= east, within -90..90 and -180..180'
+    if polygon is not None and (
+            not isinstance(polygon, list) or len(polygon) < 3 or
+            any(not isinstance(p, (list, tuple)) or len(p) != 2 or not all(is_number(v) for v in p)
+                for p in polygon)):
+        return None, 'polygon must be a list of at least 3 [lat, lng] points'
+    if not isinstance(tile_radius, int) or tile_radius < 100 or tile_radius > 5000:
+        tile_radius = 500
+    area = bounds or (polygon_bounds(polygon) if polygon is not None else None)
+    if area is not None and count_tiles(area, tile_radius) > MAX_TILES:
+        return None, (f'Search area needs more than {MAX_TILES} tiles of {tile_radius} m; '
+                      'use a smaller area or a larger tile_radius')
+    
+    export_format, error = parse_export_format(data)
+    if error:
+        return None, error
+    
+    return {
+        'keywords': keywords,
+        'location': location,
+        'category': category,
+        'bounds': bounds,
+        'polygon': polygon,
+        'tile_radius': tile_radius,
+        'export_format': export_format,
+    }, None
+
+def parse_linkedin_request(data):
+    """Validate an extract-linkedin-profiles payload. Returns (kwargs, error_message)."""
+    if not data:
+        return None, 'No data provided'
+    
+    company_name = data.get('company_name', '').strip()
+    location = data.get('location', 'Hong Kong').strip()
+    limit = data.get('limit', 10)
+    
+    if not company_name:
+        return None, 'Company name is required'
+    
+    if not location:
+        return None, 'Location is required'
+    
+    # Validate limit
+    if not isinstance(limit, int) or limit < 1 or limit > 50:
+        limit = 10
+    
+    export_format, error = parse_export_format(data)
+    if error:
+        return None, error
+    
+    return {'company_name': company_name, 'location': location, 'limit': limit,
+            'export_format': export_format}, None
+
+def parse_refresh_request(data):
+    """Validate a refresh-leads payload. Returns (kwargs, error_message)."""
+    params, error = parse_lead_request(data)
+    if error:
+        return None, error
+    params.pop('category')
+    max_age = data.get('max_age')
+    if max_age is not None:
+        if not isinstance(max_age, (int, float)) or max_age < 0:
+            return None, 'max_age must be a non-negative number of seconds'
+        params['max_age'] = max_age
+    return params, None
+
+# Maximum companies accepted by one batch request
+MAX_BATCH_COMPANIES = int(os.environ.get('MAX_BATCH_COMPANIES', '500'))
+
+def parse_linkedin_batch_request(data):
+    """Validate a batch LinkedIn payload. Returns (kwargs, error_message)."""
+    if not data:
+        return None, 'No data provided'
+    
+    companies = data.get('companies')
+    location = data.get('location', 'Hong Kong').strip()
+    limit = data.get('limit', 10)
+    
+    if not isinstance(companies, list) or not companies:
+        return None, 'companies must be a non-empty list of company names'
+    if any(not isinstance(c, str) or not c.strip() for c in companies):
+        return None, 'Every company must be a non-empty string'
+    if len(companies) > MAX_BATCH_COMPANIES:
+        return None, f'At most {MAX_BATCH_COMPANIES} companies per batch'
+    
+    if not location:
+        return None, 'Location is required'
+    
+    # Validate limit
+    if not isinstance(limit, int) or limit < 1 or limit > 50:
+        limit = 10
+    
+    export_format, error = parse_export_format(data)
+    if error:
+        return None, error
+    
+    return {'companies': companies, 'location': location, 'limit': limit,
+            'export_format': export_format}, None
+
 @app.route('/api/extract-leads', methods=['POST', 'OPTIONS'])
 def api_extract_leads():
     # Handle preflight OPTIONS request
@@ -30,36 +216,36 @@ def api_extract_leads():
         return jsonify({'status': 'OK'})
         
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        
-        keywords = data.get('keywords', '').strip()
-        location = data.get('location', '').strip()
-        category = data.get('category', '')
+        params, error = parse_lead_request(request.get_json())
+        if error:
+            return jsonify({'error': error}), 400
         
-        if not keywords or not location:
-            return jsonify({'error': 'Keywords and location are required'}), 400
-        
-        print(f"Starting extraction for keywords: '{keywords}' in location: '{location}'")
+        logger.info("Starting extraction for keywords: '%s' in location: '%s'", params['keywords'], params['location'])
         
         # Call the lead extraction function
-        result = extract_leads(keywords, location, category)
+        # Identical requests already running (or just finished) share one extraction
+        from lead_extractor import extract_leads
+        result, shared = get_single_flight().do(
+            request_key('extract-leads', params), lambda: extract_leads(**params))
         
         return jsonify({
             'success': True,
             'message': f'Successfully extracted {result["records_count"]} leads',
             'data': {
                 'filename': result['filename'],
+                'download_url': downloads.download_url(result['filename']),
                 'records_count': result['records_count'],
-                'location': location,
-                'keywords': keywords
+                'location': params['location'],
+                'keywords': params['keywords'],
+                'coalesced': shared
             }
         })
         
+    except QuotaExceededError as e:
+        logger.warning("⚠️  Extraction stopped: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 429
     except Exception as e:
-        print(f"Error during extraction: {str(e)}")
+        logger.error("Error during extraction: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -72,37 +258,30 @@ def api_extract_linkedin_profiles():
         return jsonify({'status': 'OK'})
         
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        params, error = parse_linkedin_request(request.get_json())
+        if error:
+            return jsonify({'error': error}), 400
         
-        company_name = data.get('company_name', '').strip()
-        location = data.get('location', 'Hong Kong').strip()
-        limit = data.get('limit', 10)
-        
-        if not company_name:
-            return jsonify({'error': 'Company name is required'}), 400
-        
-        if not location:
-            return jsonify({'error': 'Location is required'}), 400
-        
-        # Validate limit
-        if not isinstance(limit, int) or limit < 1 or limit > 50:
-            limit = 10
-        
-        print(f"Starting LinkedIn profile extraction for company: '{company_name}' in '{location}' with limit: {limit}")
+        logger.info("Starting LinkedIn profile extraction for company: '%s' in '%s' with limit: %d",
+                    params['company_name'], params['location'], params['limit'])
         
         # Call the LinkedIn extraction function
-        result = extract_linkedin_profiles(company_name, location, limit)
+        from people_extractor import extract_linkedin_profiles
+        result, shared = get_single_flight().do(
+            request_key('extract-linkedin-profiles', params),
+            lambda: extract_linkedin_profiles(**params),
+            cacheable=lambda r: r['success'])
+        result = dict(result, coalesced=shared)
         
         if result['success']:
+            if result.get('filename'):
+                result['download_url'] = downloads.download_url(result['filename'])
             return jsonify(result)
         else:
             return jsonify(result), 400
         
     except Exception as e:
-        print(f"Error during LinkedIn extraction: {str(e)}")
+        logger.error("Error during LinkedIn extraction: %s", e)
         return jsonify({
             'success': False,
             'error': str(e),
@@ -111,45 +290,354 @@ def api_extract_linkedin_profiles():
             'filename': None
         }), 500
 
+@app.route('/api/extract-linkedin-profiles/batch', methods=['POST', 'OPTIONS'])
+def api_extract_linkedin_profiles_batch():
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'})
+    
+    try:
+        params, error = parse_linkedin_batch_request(request.get_json(silent=True))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        logger.info("Starting batch LinkedIn extraction for %d companies in '%s'",
+                    len(params['companies']), params['location'])
+        from people_extractor import extract_linkedin_profiles_batch
+        result, shared = get_single_flight().do(
+            request_key('extract-linkedin-profiles-batch', params),
+            lambda: extract_linkedin_profiles_batch(**params))
+        return jsonify(dict(result, coalesced=shared))
+        
+    except Exception as e:
+        logger.error("Error during batch LinkedIn extraction: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'results': [],
+            'count': 0,
+            'filename': None
+        }), 500
+
+@app.route('/api/refresh-leads', methods=['POST', 'OPTIONS'])
+def api_refresh_leads():
+    """Re-run a saved search, re-fetching details only for new or stale places."""
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'})
+    
+    try:
+        params, error = parse_refresh_request(request.get_json(silent=True))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        logger.info("Refreshing leads for keywords: '%s' in location: '%s'", params['keywords'], params['location'])
+        from lead_extractor import refresh_leads
+        result = refresh_leads(**params)
+        return jsonify({
+            'success': True,
+            'message': (f"{len(result['added'])} added, {len(result['changed'])} changed, "
+                        f"{len(result['disappeared'])} disappeared"),
+            'data': result
+        })
+        
+    except QuotaExceededError as e:
+        logger.warning("⚠️  Refresh stopped: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        logger.error("Error during refresh: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Streaming variants: each lead/profile is sent as an SSE event or NDJSON line
+# as soon as it is built, followed by a summary event with the file name.
+# Use ?format=sse|ndjson or an Accept: text/event-stream header.
+@app.route('/api/extract-leads/stream', methods=['POST', 'OPTIONS'])
+def api_extract_leads_stream():
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'})
+    
+    params, error = parse_lead_request(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    def produce(emit):
+        from lead_extractor import extract_leads
+        result = extract_leads(
+            **params,
+            on_record=lambda record: emit({'type': 'lead', 'data': record}),
+            progress=(lambda tile: emit({'type': 'progress', 'data': tile}))
+            if params['bounds'] or params['polygon'] else None)
+        emit({'type': 'summary', 'data': {
+            'filename': result['filename'],
+            'records_count': result['records_count'],
+            'location': params['location'],
+            'keywords': params['keywords']
+        }})
+    
+    fmt = choose_format(request.args.get('format'), request.headers.get('Accept', ''))
+    logger.info("Streaming extraction for keywords: '%s' in location: '%s'", params['keywords'], params['location'])
+    return Response(stream_events(produce, fmt), headers=stream_headers(fmt))
+
+@app.route('/api/extract-linkedin-profiles/stream', methods=['POST', 'OPTIONS'])
+def api_extract_linkedin_profiles_stream():
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'})
+    
+    params, error = parse_linkedin_request(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    def produce(emit):
+        from people_extractor import extract_linkedin_profiles
+        result = extract_linkedin_profiles(
+            **params, on_profile=lambda profile: emit({'type': 'profile', 'data': profile}))
+        if not result['success']:
+            emit({'type': 'error', 'error': result['error']})
+            return
+        emit({'type': 'summary', 'data': {
+            'filename': result['filename'],
+            'count': result['count'],
+            'company': result['company']
+        }})
+    
+    fmt = choose_format(request.args.get('format'), request.headers.get('Accept', ''))
+    logger.info("Streaming LinkedIn extraction for company: '%s'", params['company_name'])
+    return Response(stream_events(produce, fmt), headers=stream_headers(fmt))
+
+# Background jobs: POST returns a job id at once, clients poll GET /api/jobs/<id>
+def run_lead_job(params, context):
+    from lead_extractor import extract_leads
+    result = extract_leads(**params, on_record=context.add_result,
+                           progress=context.set_progress if params.get('bounds') or params.get('polygon') else None)
+    return {
+        'filename': result['filename'],
+        'records_count': result['records_count'],
+        'location': params['location'],
+        'keywords': params['keywords']
+    }
+
+def run_linkedin_batch_job(params, context):
+    context.check_cancelled()
+    from people_extractor import extract_linkedin_profiles_batch
+
+    def on_company(result):
+        # Published per company; also where a cancel request stops the batch
+        context.add_result({'company': result['company'], 'success': result['success'],
+                            'count': result['count'], 'error': result['error']})
+    return extract_linkedin_profiles_batch(**params, on_company=on_company)
+
+def run_refresh_job(params, context):
+    context.check_cancelled()
+    from lead_extractor import refresh_leads
+    return refresh_leads(**params, on_record=context.add_result)
+
+def run_linkedin_job(params, context):
+    from people_extractor import extract_linkedin_profiles
+    result = extract_linkedin_profiles(**params, on_profile=context.add_result)
+    if not result['success']:
+        # extract_linkedin_profiles reports errors in its result, JobCancelled included
+        context.check_cancelled()
+        raise RuntimeError(result['error'])
+    return {
+        'filename': result['filename'],
+        'count': result['count'],
+        'company': result['company'],
+        'profiles': result['profiles']
+    }
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """Create the job manager (and its store) on the first jobs request."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            from jobs import JobManager, create_job_store
+            manager = JobManager(create_job_store(path=os.path.join(get_exports_dir(), 'jobs.sqlite3')))
+            manager.register('extract-leads', run_lead_job)
+            manager.register('extract-linkedin-profiles', run_linkedin_job)
+            manager.register('refresh-leads', run_refresh_job)
+            manager.register('extract-linkedin-profiles-batch', run_linkedin_batch_job)
+            _job_manager = manager
+        return _job_manager
+
+def job_response(job):
+    body = {
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'params': job['params'],
+        'progress': job['progress'],
+        'partial_results': job['partial_results'],
+        'result': job['result'],
+        'error': job['error'],
+        'timings': job.get('timings'),
+        'status_url': f"/api/jobs/{job['id']}"
+    }
+    filename = (job['result'] or {}).get('filename')
+    if filename:
+        body['download_url'] = downloads.download_url(filename)
+    return body
+
+@app.route('/api/jobs/<kind>', methods=['POST', 'OPTIONS'])
+def api_submit_job(kind):
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'})
+    
+    parsers = {
+        'extract-leads': parse_lead_request,
+        'extract-linkedin-profiles': parse_linkedin_request,
+        'refresh-leads': parse_refresh_request,
+        'extract-linkedin-profiles-batch': parse_linkedin_batch_request,
+    }
+    if kind not in parsers:
+        return jsonify({'error': f'Unknown job type: {kind}'}), 404
+    
+    params, error = parsers[kind](request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    from jobs import QueueFullError
+    try:
+        job = get_job_manager().submit(kind, params)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    logger.info("Queued %s job %s", kind, job['id'], extra={'job_id': job['id'], 'kind': kind})
+    return jsonify(job_response(job)), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    return jsonify(job_response(job))
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST', 'OPTIONS'])
+def api_cancel_job(job_id):
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'})
+    
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    return jsonify(job_response(job))
+
+def paging_args():
+    """limit/offset/since query parameters shared by the history endpoints."""
+    limit = request.args.get('limit', 50, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    since = request.args.get('since', type=float)
+    return max(1, min(limit, 500)), max(0, offset), since
+
+@app.route('/api/leads', methods=['GET'])
+def api_list_leads():
+    """Page through previously extracted leads without calling Google."""
+    from lead_store import get_lead_store
+    store = get_lead_store()
+    if store is None:
+        return jsonify({'error': 'Lead store is disabled'}), 503
+    limit, offset, since = paging_args()
+    leads = store.query_leads(keyword=request.args.get('keyword'),
+                              district=request.args.get('district'),
+                              since=since, limit=limit, offset=offset)
+    return jsonify({'leads': leads, 'count': len(leads), 'limit': limit, 'offset': offset})
+
+@app.route('/api/profiles', methods=['GET'])
+def api_list_profiles():
+    """Page through previously extracted LinkedIn profiles."""
+    from lead_store import get_lead_store
+    store = get_lead_store()
+    if store is None:
+        return jsonify({'error': 'Lead store is disabled'}), 503
+    limit, offset, since = paging_args()
+    profiles = store.query_profiles(company=request.args.get('company'),
+                                    since=since, limit=limit, offset=offset)
+    return jsonify({'profiles': profiles, 'count': len(profiles), 'limit': limit, 'offset': offset})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'Backend is running'})
+    body = {'status': 'healthy', 'message': 'Backend is running',
+            'coalescing': get_single_flight().stats()}
+    # Only report the search cache if a LinkedIn route has already loaded it
+    people_extractor = sys.modules.get('people_extractor')
+    if people_extractor is not None:
+        body['search_cache'] = people_extractor.search_cache_stats()
+    return jsonify(body)
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text-format metrics: API call, stage and request latencies, caches, quota."""
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/api/download/<filename>', methods=['GET'])
 def download_file(filename):
+    """
+    Send an export. Content-addressed names (see downloads.download_url) are
+    cached as immutable; plain names are revalidated with ETag/Last-Modified.
+    Range requests are honoured, and larger text exports are gzip/brotli
+    compressed once per version when the client accepts it.
+    """
     try:
-        # Ensure the filename is safe and exists
-        import os
         from flask import send_file
         
-        # Enhanced Vercel/serverless environment detection
-        is_vercel = (
-            os.environ.get("VERCEL") == "1" or 
-            os.environ.get("VERCEL_ENV") is not None or 
-            "/var/task" in os.environ.get("PYTHONPATH", "") or
-            os.path.exists("/tmp") and not os.path.exists("C:\\")
-        )
+        plain_name, digest = downloads.split_versioned_name(filename)
+        file_path = downloads.find_export(plain_name)
+        if file_path is None:
+            logger.warning("❌ File not found: %s", filename)
+            return jsonify({'error': f'File not found: {filename}'}), 404
+        if digest is not None and downloads.file_digest(file_path) != digest:
+            # The export was rewritten since this URL was handed out
+            return jsonify({'error': f'File no longer available: {filename}'}), 404
         
-        if is_vercel:
-            base_dir = "/tmp"
-            print(f"🔧 Using Vercel serverless directory for download: {base_dir}")
-        else:
-            base_dir = "exports"
-            print(f"🔧 Using local directory for download: {base_dir}")
+        # Optional ?format= converts the export (e.g. CSV to Parquet) on the way out
+        export_format = request.args.get('format')
+        if export_format:
+            error = check_export_format(export_format)
+            if error:
+                return jsonify({'error': error}), 400
+            try:
+                file_path = convert_export(file_path, export_format)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
-        # Construct the full path to the file
-        file_path = os.path.join(base_dir, filename)
-        print(f"📥 Attempting to download file: {file_path}")
+        current = downloads.file_digest(file_path)
+        compressible = downloads.should_compress(file_path)
+        encoding = None
+        if compressible and request.range is None:
+            encoding = downloads.choose_encoding(request.headers.get('Accept-Encoding', ''))
+        send_path = downloads.compressed_copy(file_path, current, encoding) if encoding else file_path
         
-        if os.path.exists(file_path):
-            print(f"✅ File found, sending: {file_path}")
-            return send_file(file_path, as_attachment=True, download_name=filename)
+        logger.info("✅ File found, sending: %s", file_path)
+        response = send_file(
+            send_path,
+            as_attachment=True,
+            download_name=os.path.basename(file_path),
+            conditional=True,
+            etag=f"{current}-{encoding}" if encoding else current,
+            last_modified=os.path.getmtime(file_path),
+            max_age=downloads.IMMUTABLE_MAX_AGE if digest else None,
+        )
+        if digest:
+            response.cache_control.immutable = True
         else:
-            print(f"❌ File not found: {file_path}")
-            return jsonify({'error': f'File not found: {filename}'}), 404
+            response.cache_control.no_cache = True
+        if encoding and response.status_code != 304:
+            response.headers['Content-Encoding'] = encoding
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        return response
             
     except Exception as e:
-        print(f"Error downloading file: {str(e)}")
+        logger.error("Error downloading file: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/', methods=['GET'])
@@ -163,5 +651,5 @@ if __name__ != '__main__':
 else:
     # This is for local development
     if __name__ == "__main__":
-        print("Starting Flask server...")
+        logger.info("Starting Flask server...")
         app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
@@ -0,0 +1,204 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from rate_limit import QuotaExceededError
+
+# Google returns at most 60 results (3 pages) for a single Nearby Search
+PLACES_RESULT_CAP = 60
+
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Largest starting grid a tiled search may use; every tile costs at least one
+# Nearby Search call (more if it is split)
+MAX_TILES = int(os.environ.get('MAX_TILES', '400'))
+
+
+def meters_to_degrees(meters: float, lat: float) -> tuple[float, float]:
+    """Convert a distance in meters to (lat, lng) degree offsets at `lat`."""
+    dlat = meters / METERS_PER_DEGREE_LAT
+    dlng = meters / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return dlat, dlng
+
+
+def point_in_polygon(lat: float, lng: float, polygon: list) -> bool:
+    """Ray-casting test; `polygon` is a list of (lat, lng) vertices."""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lng_i = polygon[i]
+        lat_j, lng_j = polygon[j]
+        if (lng_i > lng) != (lng_j > lng):
+            crossing = (lat_j - lat_i) * (lng - lng_i) / (lng_j - lng_i) + lat_i
+            if lat < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def polygon_bounds(polygon: list) -> dict:
+    lats = [p[0] for p in polygon]
+    lngs = [p[1] for p in polygon]
+    return {"south": min(lats), "west": min(lngs), "north": max(lats), "east": max(lngs)}
+
+
+def tile_square(tile: dict) -> dict:
+    """Bounds of the square a tile's circle fully covers (side = radius * sqrt 2)."""
+    dlat, dlng = meters_to_degrees(tile["radius"] / math.sqrt(2), tile["lat"])
+    return {
+        "south": tile["lat"] - dlat, "north": tile["lat"] + dlat,
+        "west": tile["lng"] - dlng, "east": tile["lng"] + dlng,
+    }
+
+
+def tile_intersects_polygon(tile: dict, polygon: list) -> bool:
+    """Approximate overlap test between a tile's square and a polygon."""
+    sq = tile_square(tile)
+    corners = [
+        (tile["lat"], tile["lng"]),
+        (sq["south"], sq["west"]), (sq["south"], sq["east"]),
+        (sq["north"], sq["west"]), (sq["north"], sq["east"]),
+    ]
+    if any(point_in_polygon(lat, lng, polygon) for lat, lng in corners):
+        return True
+    return any(
+        sq["south"] <= lat <= sq["north"] and sq["west"] <= lng <= sq["east"]
+        for lat, lng in polygon
+    )
+
+
+def grid_shape(bounds: dict, radius: float) -> tuple[int, int, float, float]:
+    """(rows, cols, dlat, dlng) of the grid grid_tiles() lays over `bounds`."""
+    mid_lat = (bounds["south"] + bounds["north"]) / 2
+    spacing = radius * math.sqrt(2)
+    dlat, dlng = meters_to_degrees(spacing, mid_lat)
+    rows = max(1, math.ceil((bounds["north"] - bounds["south"]) / dlat))
+    cols = max(1, math.ceil((bounds["east"] - bounds["west"]) / dlng))
+    return rows, cols, dlat, dlng
+
+
+def count_tiles(bounds: dict, radius: float) -> int:
+    """Number of grid points grid_tiles() considers, before any polygon filtering."""
+    rows, cols, _, _ = grid_shape(bounds, radius)
+    return rows * cols
+
+
+def grid_tiles(bounds: dict, radius: float, polygon: list = None):
+    """
+    Cover `bounds` ({south, west, north, east}) with overlapping circles of
+    `radius` meters. Centers sit on a square grid spaced radius * sqrt 2
+    apart so neighbouring circles overlap and leave no gaps. Tiles are
+    generated lazily, row by row.
+    """
+    rows, cols, dlat, dlng = grid_shape(bounds, radius)
+    for r in range(rows):
+        for c in range(cols):
+            tile = {
+                "lat": bounds["south"] + (r + 0.5) * dlat,
+                "lng": bounds["west"] + (c + 0.5) * dlng,
+                "radius": radius,
+                "depth": 0,
+            }
+            if polygon is None or tile_intersects_polygon(tile, polygon):
+                yield tile
+
+
+def split_tile(tile: dict) -> list[dict]:
+    """Split a tile into four quadrant tiles with half the radius."""
+    radius = tile["radius"] / 2
+    dlat, dlng = meters_to_degrees(radius / math.sqrt(2), tile["lat"])
+    return [
+        {"lat": tile["lat"] + sy * dlat, "lng": tile["lng"] + sx * dlng,
+         "radius": radius, "depth": tile["depth"] + 1}
+        for sy in (-1, 1) for sx in (-1, 1)
+    ]
+
+
+def tiled_search(search, bounds: dict = None, polygon: list = None, radius: float = 500,
+                 min_radius: float = 100, max_workers: int = 4, progress=None):
+    """
+    Run `search(lat, lng, radius)` over a tiled area and yield, per finished
+    tile, the list of places not already seen (deduplicated by place_id).
+
+    A tile that hits the 60-result cap is split into four smaller tiles
+    (down to `min_radius`) because it probably missed places. `progress`
+    is called with a dict describing each finished tile. A failed tile is
+    reported and skipped, except for QuotaExceededError, which ends the
+    search (tiles not yet started are cancelled).
+
+    Grid tiles are submitted a few at a time as workers free up, so a large
+    area isn't queued all at once. ValueError is raised for a grid of more
+    than MAX_TILES tiles.
+    """
+    if polygon is not None:
+        polygon = [tuple(p) for p in polygon]
+        bounds = bounds or polygon_bounds(polygon)
+    if bounds is None:
+        raise ValueError("Tiled search needs bounds or a polygon")
+    if count_tiles(bounds, radius) > MAX_TILES:
+        raise ValueError(f"Search area needs more than {MAX_TILES} tiles; use a smaller area or a larger tile_radius")
+    max_workers = max(1, max_workers)
+
+    seen = set()
+    lock = threading.Lock()
+    stats = {"completed": 0, "total": sum(1 for _ in grid_tiles(bounds, radius, polygon)), "places": 0}
+    tiles = grid_tiles(bounds, radius, polygon)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(tile):
+            pending[executor.submit(search, tile["lat"], tile["lng"], tile["radius"])] = tile
+
+        def fill():
+            # Keep every worker busy with one tile queued behind it
+            while len(pending) < 2 * max_workers:
+                tile = next(tiles, None)
+                if tile is None:
+                    break
+                submit(tile)
+
+        fill()
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                tile = pending.pop(future)
+                stats["completed"] += 1
+                try:
+                    places = future.result()
+                    error = None
+                except QuotaExceededError:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                except Exception as e:
+                    places, error = [], e
+
+                new_places = []
+                with lock:
+                    for place in places:
+                        place_id = place.get("place_id")
+                        if place_id and place_id not in seen:
+                            seen.add(place_id)
+                            new_places.append(place)
+                    stats["places"] += len(new_places)
+
+                split = len(places) >= PLACES_RESULT_CAP and tile["radius"] / 2 >= min_radius
+                if split:
+                    for sub_tile in split_tile(tile):
+                        if polygon is None or tile_intersects_polygon(sub_tile, polygon):
+                            submit(sub_tile)
+                            stats["total"] += 1
+
+                if progress is not None:
+                    progress({
+                        "lat": tile["lat"], "lng": tile["lng"], "radius": tile["radius"],
+                        "depth": tile["depth"], "found": len(places), "new": len(new_places),
+                        "split": split, "error": str(error) if error else None,
+                        "completed": stats["completed"], "total": stats["total"],
+                        "unique_places": stats["places"],
+                    })
+
+                if new_places:
+                    yield new_places
+            fill()
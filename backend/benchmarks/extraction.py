@@ -0,0 +1,268 @@
+"""
+End-to-end extraction benchmark against a local stand-in for the Google APIs.
+
+Starts benchmarks/stub_google.py in-process, points the backend at it
+(GOOGLE_API_BASE_URL) and runs each scenario: `extract_leads`, tiled
+`extract_leads`, `scrape_company_people`, and the /api/extract-leads and
+/api/extract-linkedin-profiles endpoints through the Flask test client.
+Reports throughput, p50/p95/p99 latency and peak traced memory, and can
+save the report as a JSON baseline and compare a later run against it.
+
+    python benchmarks/extraction.py [--iterations 10] [--concurrency 2] [--latency 0.05]
+        [--error-rate 0.01] [--scenarios leads,people] [--throttled] [--warm]
+        [--save baseline.json] [--compare baseline.json] [--tolerance 0.1]
+
+By default the backend's own rate limits and page-token delay are turned
+off so the numbers reflect the code and the stub's latency; --throttled
+keeps the configured limits. Each call uses a fresh query (cold caches)
+unless --warm is given.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_google import StubConfig, start_stub  # noqa: E402
+
+SCENARIOS = ("leads", "leads-tiled", "people", "api-leads", "api-people")
+
+# A ~1 x 1 km area: a handful of tiles at the default 500 m radius
+TILED_BOUNDS = {"south": 22.275, "west": 114.150, "north": 22.284, "east": 114.160}
+PEOPLE_LIMIT = 25
+
+# Metrics compared against a baseline, and whether larger is better
+COMPARED_METRICS = {
+    "throughput_per_s": True,
+    "items_per_s": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_memory_mb": False,
+}
+
+
+def configure_environment(stub_url: str, throttled: bool):
+    """Set backend configuration; must run before any backend module is imported."""
+    os.environ["GOOGLE_API_BASE_URL"] = stub_url
+    for name in ("GOOGLE_MAPS_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Memory-only caches and no lead store, so runs don't affect each other
+    for name in ("GEOCODE_CACHE_PATH", "DETAILS_CACHE_PATH", "SEARCH_CACHE_PATH"):
+        os.environ[name] = ""
+    os.environ["LEAD_STORE_ENABLED"] = "0"
+    os.environ["JOB_STORE"] = "memory"
+    os.environ["RATE_LIMIT_STORE"] = "memory"
+    if not throttled:
+        os.environ["GEOCODE_REQUESTS_PER_SECOND"] = "0"
+        os.environ["NEARBY_REQUESTS_PER_SECOND"] = "0"
+        os.environ["DETAILS_REQUESTS_PER_SECOND"] = "0"
+        os.environ["CUSTOM_SEARCH_QPS"] = "0"
+        os.environ["CUSTOM_SEARCH_DAILY_QUOTA"] = "0"
+        os.environ["PAGE_TOKEN_DELAY"] = "0"
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def remove_export(filename):
+    if filename and os.path.exists(filename):
+        os.remove(filename)
+
+
+def make_operation(scenario: str, client):
+    """Callable(query) -> number of items (leads/profiles) produced by one run of `scenario`."""
+    if scenario in ("leads", "leads-tiled"):
+        from lead_extractor import extract_leads
+        bounds = TILED_BOUNDS if scenario == "leads-tiled" else None
+
+        def run(query):
+            result = extract_leads(query, "Central, Hong Kong", bounds=bounds)
+            remove_export(result["filename"])
+            return result["records_count"]
+        return run
+
+    if scenario == "people":
+        from people_extractor import scrape_company_people
+
+        def run(query):
+            return len(scrape_company_people(query, limit=PEOPLE_LIMIT))
+        return run
+
+    if scenario == "api-leads":
+        def run(query):
+            resp = client.post("/api/extract-leads",
+                               json={"keywords": query, "location": "Central, Hong Kong"})
+            data = resp.get_json()["data"]
+            remove_export(data["filename"])
+            return data["records_count"]
+        return run
+
+    if scenario == "api-people":
+        def run(query):
+            resp = client.post("/api/extract-linkedin-profiles",
+                               json={"company_name": query, "limit": PEOPLE_LIMIT})
+            body = resp.get_json()
+            remove_export(body.get("filename"))
+            return body.get("count", 0)
+        return run
+
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def run_scenario(scenario: str, stub, client, iterations: int, concurrency: int, warm: bool) -> dict:
+    operation = make_operation(scenario, client)
+    run_id = uuid.uuid4().hex[:8]
+    latencies, items, errors = [], [], []
+    requests_before = dict(stub.requests)
+
+    def timed(i):
+        query = f"bench {run_id}" if warm else f"bench {run_id} {i}"
+        started = time.perf_counter()
+        try:
+            count = operation(query)
+        except Exception as e:
+            errors.append(str(e))
+            return
+        latencies.append(time.perf_counter() - started)
+        items.append(count)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(iterations)))
+    wall = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "errors": len(errors),
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(latencies) / wall, 3),
+        "items": sum(items),
+        "items_per_s": round(sum(items) / wall, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_memory_mb": round(peak / 2 ** 20, 2),
+        "api_calls": {
+            endpoint: count - requests_before.get(endpoint, 0)
+            for endpoint, count in stub.requests.items()
+            if count != requests_before.get(endpoint, 0)
+        },
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print metric changes against `baseline`; returns the regressions beyond `tolerance`."""
+    regressions = []
+    print(f"\nCompared with baseline ({baseline.get('created', 'unknown date')})")
+    changed = {k: v for k, v in report["settings"].items() if baseline.get("settings", {}).get(k) != v}
+    if changed:
+        print(f"  Settings differ from the baseline: {changed}")
+    for scenario, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if previous is None:
+            print(f"  {scenario:<12} not in baseline")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            print(f"  {scenario:<12} {metric:<17} {old:>10} -> {new:>10} ({change:+.1%}){flag}")
+            if flag:
+                regressions.append(f"{scenario} {metric}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=10, help="runs per scenario")
+    parser.add_argument("--concurrency", type=int, default=2, help="runs in parallel")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub mean response time (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="stub latency spread, +/- fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub responses that are HTTP 500")
+    parser.add_argument("--places", type=int, default=45,
+                        help="Nearby Search results per query (60 hits the cap, so tiles split)")
+    parser.add_argument("--seed", type=int, default=1, help="stub random seed")
+    parser.add_argument("--throttled", action="store_true", help="keep the configured rate limits")
+    parser.add_argument("--warm", action="store_true", help="repeat one query so caches are warm")
+    parser.add_argument("--save", help="write the report (baseline) to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative change counted as a regression (exit status 1)")
+    args = parser.parse_args()
+
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stub = start_stub(StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                 places_per_query=args.places, seed=args.seed))
+    configure_environment(stub.url, args.throttled)
+    # Exports land in the backend's exports directory; run from a scratch cwd so
+    # a local "exports/" isn't created next to the real one
+    os.chdir(tempfile.mkdtemp(prefix="hkgrow-bench-"))
+    import app
+    client = app.app.test_client()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "settings": {k: getattr(args, k) for k in
+                     ("iterations", "concurrency", "latency", "jitter", "error_rate", "places",
+                      "seed", "throttled", "warm")},
+        "scenarios": {},
+    }
+    print(f"Stub at {stub.url}: latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.1%}; "
+          f"{args.iterations} runs x concurrency {args.concurrency}")
+    print(f"  {'scenario':<12} {'runs/s':>8} {'items/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'peak MB':>8} {'errors':>6}")
+    for scenario in scenarios:
+        result = run_scenario(scenario, stub, client, args.iterations, args.concurrency, args.warm)
+        report["scenarios"][scenario] = result
+        print(f"  {scenario:<12} {result['throughput_per_s']:>8} {result['items_per_s']:>9} "
+              f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+              f"{result['peak_memory_mb']:>8} {result['errors']:>6}")
+    stub.shutdown()
+
+    regressions = []
+    if compare_path:
+        with open(compare_path) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {save_path}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark for the backend.
+
+Each measurement runs in a fresh interpreter (like a new serverless
+instance): per-module import cost from `python -X importtime`, and the time
+from interpreter start to the first response of a route via the Flask test
+client, with the extractors loaded lazily (as deployed) and eagerly.
+
+    python benchmarks/startup.py [--runs 5] [--top 15] [--path /api/health] [--json out.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend modules whose import cost is measured, each in its own interpreter
+MODULES = ("app", "lead_extractor", "people_extractor", "jobs", "lead_store",
+           "http_client", "company_matcher", "cache", "streaming")
+
+FIRST_RESPONSE = """
+import time
+started = time.perf_counter()
+{preload}
+import app
+imported = time.perf_counter()
+app.app.test_client().get({path!r})
+print(imported - started, time.perf_counter() - started)
+"""
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def run_python(code: str, *flags) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=BACKEND_DIR,
+                          capture_output=True, text=True, check=True)
+
+
+def import_times(module: str) -> dict:
+    """{imported module: (self_us, cumulative_us)} for `import module` in a fresh interpreter."""
+    result = run_python(f"import {module}", "-X", "importtime")
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(3)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def first_response(path: str, eager: bool) -> tuple[float, float]:
+    preload = "import lead_extractor, people_extractor, jobs, lead_store" if eager else ""
+    result = run_python(FIRST_RESPONSE.format(preload=preload, path=path))
+    imported, responded = result.stdout.split()[-2:]
+    return float(imported), float(responded)
+
+
+def median_ms(values) -> float:
+    return round(statistics.median(values) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="heaviest imports of app to list")
+    parser.add_argument("--path", default="/api/health", help="route for the first-response timing")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "runs": args.runs, "modules": {}}
+
+    print(f"Import cost per module (median of {args.runs} fresh interpreters)")
+    for module in MODULES:
+        samples = [import_times(module)[module][1] / 1e6 for _ in range(args.runs)]
+        report["modules"][module] = median_ms(samples)
+        print(f"  {module:<20} {report['modules'][module]:>9.2f} ms")
+
+    app_times = import_times("app")
+    heaviest = sorted(((name, t) for name, t in app_times.items() if name != "app"),
+                      key=lambda item: item[1][1], reverse=True)[:args.top]
+    report["app_imports"] = [
+        {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+        for name, (self_us, cumulative_us) in heaviest
+    ]
+    print(f"\nHeaviest imports pulled in by app (cumulative / self)")
+    for entry in report["app_imports"]:
+        print(f"  {entry['module']:<40} {entry['cumulative_ms']:>9.2f} ms {entry['self_ms']:>9.2f} ms")
+
+    print(f"\nFirst response to GET {args.path} from a fresh interpreter")
+    report["first_response"] = {}
+    for label, eager in (("lazy", False), ("eager", True)):
+        samples = [first_response(args.path, eager) for _ in range(args.runs)]
+        timing = {
+            "import_ms": median_ms([s[0] for s in samples]),
+            "first_response_ms": median_ms([s[1] for s in samples]),
+        }
+        report["first_response"][label] = timing
+        print(f"  {label:<6} import {timing['import_ms']:>9.2f} ms, "
+              f"first response {timing['first_response_ms']:>9.2f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
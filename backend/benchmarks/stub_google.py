@@ -0,0 +1,222 @@
+"""
+Local stand-in for the Google APIs the extractors call: Geocoding, Places
+Nearby Search (with next_page_token paging), Places Details and Custom
+Search. Responses are generated deterministically from the request, with
+configurable latency and error rate, so extraction can be benchmarked
+without spending quota.
+
+    python benchmarks/stub_google.py [--port 8765] [--latency 0.1] [--error-rate 0.01]
+
+then start the backend with GOOGLE_API_BASE_URL=http://127.0.0.1:8765.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Nearby Search returns at most 20 places per page and 3 pages per query
+PAGE_SIZE = 20
+MAX_PAGES = 3
+
+QUOTED = re.compile(r'"([^"]+)"')
+
+
+def digest(*parts) -> str:
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:12]
+
+
+class StubConfig:
+    """Behaviour of the stub; attributes can be changed while it runs."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.5, error_rate: float = 0.0,
+                 places_per_query: int = 45, search_results: int = 40, token_delay: float = 0.0,
+                 seed: int = None):
+        self.latency = latency                     # mean seconds per response
+        self.jitter = jitter                       # +/- fraction of latency, uniform
+        self.error_rate = error_rate               # fraction of requests answered with HTTP 500
+        self.places_per_query = places_per_query   # Nearby Search results per query (<= 60)
+        self.search_results = search_results       # Custom Search results per query
+        self.token_delay = token_delay             # seconds before a page token becomes valid
+        self.random = random.Random(seed)
+
+
+class StubGoogleServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.tokens = {}
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def issue_token(self, query: str, page: int) -> str:
+        token = digest("token", query, page)
+        with self._lock:
+            self.tokens[token] = (query, page, time.monotonic() + self.config.token_delay)
+        return token
+
+    def redeem_token(self, token: str):
+        """(query, page) for a token, "invalid" if it isn't valid yet, or None if unknown."""
+        with self._lock:
+            entry = self.tokens.get(token)
+        if entry is None:
+            return None
+        query, page, valid_from = entry
+        return (query, page) if time.monotonic() >= valid_from else "invalid"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body: dict, status: int = 200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        config = self.server.config
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        routes = {
+            "/maps/api/geocode/json": ("geocode", self.geocode),
+            "/maps/api/place/nearbysearch/json": ("nearbysearch", self.nearby_search),
+            "/maps/api/place/details/json": ("details", self.details),
+            "/customsearch/v1": ("customsearch", self.custom_search),
+        }
+        if parsed.path not in routes:
+            self.send_json({"error": f"unknown path {parsed.path}"}, 404)
+            return
+        endpoint, handler = routes[parsed.path]
+        self.server.count(endpoint)
+
+        with self.server._lock:
+            delay = config.latency * (1 + config.random.uniform(-config.jitter, config.jitter))
+            failed = config.random.random() < config.error_rate
+        time.sleep(max(0.0, delay))
+        if failed:
+            self.send_json({"error": {"code": 500, "message": "stub error"}}, 500)
+            return
+        self.send_json(handler(params))
+
+    def geocode(self, params):
+        seed = int(digest(params.get("address", "")), 16)
+        lat = 22.2 + (seed % 1000) / 10000
+        lng = 114.1 + (seed // 1000 % 1000) / 10000
+        return {"status": "OK", "results": [{"geometry": {"location": {"lat": lat, "lng": lng}}}]}
+
+    def nearby_search(self, params):
+        config = self.server.config
+        if "pagetoken" in params:
+            redeemed = self.server.redeem_token(params["pagetoken"])
+            if redeemed is None or redeemed == "invalid":
+                return {"status": "INVALID_REQUEST", "results": []}
+            query, page = redeemed
+        else:
+            query, page = f"{params.get('keyword')}@{params.get('location')}", 0
+
+        total = min(config.places_per_query, PAGE_SIZE * MAX_PAGES)
+        first = page * PAGE_SIZE
+        lat, lng = (float(x) for x in query.rpartition("@")[2].split(","))
+        results = []
+        for i in range(first, min(first + PAGE_SIZE, total)):
+            results.append({
+                "place_id": f"stub-{digest(query, i)}",
+                "name": f"Place {i}",
+                "geometry": {"location": {"lat": lat + i * 1e-4, "lng": lng - i * 1e-4}},
+            })
+        body = {"status": "OK" if results else "ZERO_RESULTS", "results": results}
+        if first + PAGE_SIZE < total:
+            body["next_page_token"] = self.server.issue_token(query, page + 1)
+        return body
+
+    def details(self, params):
+        place_id = params.get("place_id", "")
+        seed = int(digest(place_id), 16)
+        return {"status": "OK", "result": {
+            "place_id": place_id,
+            "name": f"Business {place_id[-6:]}",
+            "formatted_address": f"Hong Kong, {seed % 200} Queen's Road Central",
+            "international_phone_number": f"+852 {2000 + seed % 8000} {seed % 10000:04d}",
+            "website": f"https://example.com/{place_id}",
+            "price_level": seed % 4 + 1,
+            "rating": round(3 + (seed % 20) / 10, 1),
+            "user_ratings_total": seed % 5000,
+            "geometry": {"location": {"lat": 22.28, "lng": 114.15}},
+        }}
+
+    def custom_search(self, params):
+        config = self.server.config
+        query = params.get("q", "")
+        match = QUOTED.search(query)
+        company = match.group(1) if match else "Company"
+        start = int(params.get("start", 1))
+        num = int(params.get("num", 10))
+        items = []
+        for n in range(start, min(start + num, config.search_results + 1)):
+            person = digest(query, n)
+            items.append({
+                "link": f"https://hk.linkedin.com/in/person-{person}",
+                "title": f"Person {person} - Analyst at {company} | LinkedIn",
+                "snippet": f"Hong Kong · Analyst at {company} · 500+ connections",
+            })
+        body = {"searchInformation": {"totalResults": str(config.search_results)}}
+        if items:
+            body["items"] = items
+        return body
+
+
+def start_stub(config: StubConfig = None, host: str = "127.0.0.1", port: int = 0) -> StubGoogleServer:
+    """Start the stub in a background thread; port 0 picks a free port (see `server.url`)."""
+    server = StubGoogleServer((host, port), config or StubConfig())
+    threading.Thread(target=server.serve_forever, name="stub-google", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean response time (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency spread, +/- fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with HTTP 500")
+    parser.add_argument("--places", type=int, default=45,
+                        help="Nearby Search results per query (60 hits the cap, so tiles split)")
+    parser.add_argument("--search-results", type=int, default=40, help="Custom Search results per query")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="seconds before a next_page_token is accepted")
+    args = parser.parse_args()
+
+    config = StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        places_per_query=args.places, search_results=args.search_results,
+                        token_delay=args.token_delay)
+    server = StubGoogleServer((args.host, args.port), config)
+    print(f"Stub Google APIs listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Disk writes between purges of expired entries and trims to max_disk_entries
+CACHE_PURGE_EVERY = int(os.environ.get('CACHE_PURGE_EVERY', '256'))
+
+# Every TieredCache created in this process, for metrics
+_caches = []
+_caches_lock = threading.Lock()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional TTL (seconds)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str):
+        """Return (value, stored_at) without applying the TTL, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def get(self, key: str, default=None):
+        entry = self.get_entry(key)
+        if entry is None or is_expired(entry[1], self.ttl):
+            return default
+        return entry[0]
+
+    def set(self, key: str, value, stored_at: float = None):
+        with self._lock:
+            self._data[key] = (value, stored_at if stored_at is not None else time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Key/value store on disk; values are JSON-encoded."""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_stored_at ON {table} (stored_at)"
+            )
+
+    def get_entry(self, key: str):
+        """Return (value, stored_at), or None if the key is not stored."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, stored_at: float = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), stored_at if stored_at is not None else time.time()),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge(self, ttl: float = None, max_entries: int = None):
+        """Drop entries older than `ttl` and trim to the `max_entries` newest."""
+        with self._lock, self._conn:
+            if ttl is not None:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE stored_at < ?", (time.time() - ttl,)
+                )
+            if max_entries is not None:
+                # Everything older than the max_entries-th newest entry (no-op below the cap)
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE stored_at < ("
+                    f"SELECT stored_at FROM {self.table} ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+                    (max(0, max_entries - 1),),
+                )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+
+class TieredCache:
+    """
+    LRU cache in memory, optionally backed by a SQLite file so entries
+    survive process restarts. Tracks hit/miss counters. The disk store is
+    purged of expired entries and trimmed to `max_disk_entries` on open and
+    every CACHE_PURGE_EVERY writes.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = None, path: str = None,
+                 stale_ttl: float = 0, max_disk_entries: int = None):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.disk = None
+        self.max_disk_entries = max_disk_entries
+        self._disk_writes = 0
+        if path:
+            try:
+                self.disk = SQLiteCache(path, table=name)
+                self.purge_disk()
+            except sqlite3.Error as e:
+                logger.warning("⚠️  %s cache: disk store unavailable (%s), using memory only", name, e)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresher = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        with _caches_lock:
+            _caches.append(self)
+
+    def get_entry(self, key: str):
+        """Return (value, stored_at) from memory or disk, ignoring the TTL."""
+        entry = self.memory.get_entry(key)
+        if entry is None and self.disk is not None:
+            try:
+                entry = self.disk.get_entry(key)
+            except sqlite3.Error:
+                entry = None
+            if entry is not None:
+                self.memory.set(key, entry[0], stored_at=entry[1])
+                with self._lock:
+                    self.disk_hits += 1
+        return entry
+
+    def get(self, key: str, default=None):
+        entry = self.get_entry(key)
+        if entry is None or is_expired(entry[1], self.ttl):
+            self.record_miss()
+            return default
+        self.record_hit()
+        return entry[0]
+
+    def get_or_load(self, key: str, loader, cacheable=None):
+        """
+        Return the cached value for `key`, calling `loader()` on a miss.
+        Within `stale_ttl` seconds past expiry the stale value is returned
+        at once and refreshed in the background (stale-while-revalidate).
+        Results for which `cacheable(value)` is false are not stored.
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            age = time.time() - entry[1]
+            if self.ttl is None or age <= self.ttl:
+                self.record_hit()
+                return entry[0]
+            if self.stale_ttl and age <= self.ttl + self.stale_ttl:
+                with self._lock:
+                    self.stale_hits += 1
+                self.record_hit()
+                self._refresh_in_background(key, loader, cacheable)
+                return entry[0]
+
+        self.record_miss()
+        value = loader()
+        if cacheable is None or cacheable(value):
+            self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key: str, loader, cacheable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix=f"{self.name}-refresh")
+
+        def refresh():
+            try:
+                value = loader()
+                if cacheable is None or cacheable(value):
+                    self.set(key, value)
+            except Exception as e:
+                logger.warning("⚠️  %s cache: background refresh failed for %s: %s", self.name, key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(refresh)
+
+    def set(self, key: str, value):
+        stored_at = time.time()
+        self.memory.set(key, value, stored_at=stored_at)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, stored_at=stored_at)
+            except sqlite3.Error as e:
+                logger.warning("⚠️  %s cache: failed to persist entry (%s)", self.name, e)
+                return
+            with self._lock:
+                self._disk_writes += 1
+                due = self._disk_writes % max(1, CACHE_PURGE_EVERY) == 0
+            if due:
+                try:
+                    self.purge_disk()
+                except sqlite3.Error as e:
+                    logger.warning("⚠️  %s cache: purge failed (%s)", self.name, e)
+
+    def purge_disk(self):
+        """Drop disk entries past the TTL (plus stale window) and beyond max_disk_entries."""
+        max_age = self.ttl + self.stale_ttl if self.ttl is not None else None
+        self.disk.purge(ttl=max_age, max_entries=self.max_disk_entries)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self.memory),
+        }
+
+
+def cache_stats() -> list[dict]:
+    """stats() of every TieredCache created so far."""
+    with _caches_lock:
+        caches = list(_caches)
+    return [c.stats() for c in caches]
+
+
+def is_expired(stored_at: float, ttl: float = None) -> bool:
+    return ttl is not None and time.time() - stored_at > ttl
+
+
+def normalize_key(text: str) -> str:
+    """Case- and punctuation-insensitive cache key for free-text input."""
+    cleaned = "".join(c if c.isalnum() else " " for c in text.lower())
+    return " ".join(cleaned.split())
@@ -0,0 +1,147 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+import requests
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# "record" saves every Google API response to the cassette, "replay" answers
+# from it without touching the network, "off" (default) does neither
+CASSETTE_MODE = os.environ.get('HTTP_CASSETTE_MODE', 'off').lower()
+CASSETTE_PATH = os.environ.get('HTTP_CASSETTE', 'cassette.jsonl.gz')
+# Replay with the recorded response times instead of instantly
+CASSETTE_TIMING = os.environ.get('HTTP_CASSETTE_TIMING', '0') == '1'
+
+# Request parameters never written to a cassette or used for matching
+SECRET_PARAMS = {"key", "cx"}
+# Response headers kept in a cassette
+KEPT_HEADERS = ("Content-Type", "Retry-After")
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request the cassette has no response for."""
+
+
+def request_key(url: str, params: dict = None) -> str:
+    """Match key for a request: host, path and sorted parameters, without secrets."""
+    parsed = urlparse(url)
+    query = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+    return f"{parsed.netloc}{parsed.path}?{urlencode(query)}"
+
+
+def open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """
+    Recorded Google API responses, one JSON object per line (gzipped when
+    the file name ends in .gz). Repeated requests with the same key (e.g.
+    a page token polled until it becomes valid) are replayed in recorded
+    order; the last response is reused once they run out.
+    """
+
+    def __init__(self, path: str, mode: str, timing: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._positions = {}
+        self._file = None
+        if mode == "replay":
+            with open_text(path, "r") as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries.setdefault(entry["key"], []).append(entry)
+                except EOFError:
+                    # Recording was cut off before the gzip stream was closed; keep what was read
+                    logger.warning("⚠️  Cassette %s is truncated", path)
+            logger.info("Replaying %d recorded requests from %s",
+                        sum(len(v) for v in self._entries.values()), path)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open_text(path, "w")
+            atexit.register(self.close)
+            logger.info("Recording API responses to %s", path)
+
+    def record(self, url: str, params: dict, resp: requests.Response, elapsed: float):
+        body = resp.text
+        # Error messages can echo the request; never let a key end up in the file
+        for name in SECRET_PARAMS:
+            value = (params or {}).get(name)
+            if value:
+                body = body.replace(str(value), "<redacted>")
+        entry = {
+            "key": request_key(url, params),
+            "status": resp.status_code,
+            "headers": {h: resp.headers[h] for h in KEPT_HEADERS if h in resp.headers},
+            "body": body,
+            "elapsed": round(elapsed, 4),
+        }
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def play(self, url: str, params: dict):
+        """(response, recorded elapsed seconds) for a request, or raise CassetteMiss."""
+        key = request_key(url, params)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded response for {key}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        entry = entries[min(position, len(entries) - 1)]
+        if self.timing:
+            time.sleep(entry["elapsed"])
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.headers.update(entry["headers"])
+        resp._content = entry["body"].encode("utf-8")
+        resp.encoding = "utf-8"
+        resp.url = url
+        return resp, entry["elapsed"]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def get_cassette():
+    """The process-wide cassette for HTTP_CASSETTE_MODE, or None when it is off."""
+    global _cassette
+    if CASSETTE_MODE == "off":
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE, timing=CASSETTE_TIMING)
+        return _cassette
+
+
+def replaying() -> bool:
+    """True when API responses come from a cassette, so no API keys are needed."""
+    return CASSETTE_MODE == "replay"
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+
+from cache import LRUCache, normalize_key
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds a finished extraction's result is reused for identical requests (0 disables)
+COALESCE_RESULT_TTL = float(os.environ.get('COALESCE_RESULT_TTL', '30'))
+COALESCE_RESULT_SIZE = int(os.environ.get('COALESCE_RESULT_SIZE', '256'))
+
+# Free-text parameters compared case- and punctuation-insensitively
+TEXT_PARAMS = {"keywords", "location", "category", "company_name"}
+
+_MISSING = object()
+
+
+def request_key(kind: str, params: dict) -> str:
+    """Key for an extraction request: same kind and equivalent parameters, same key."""
+    normalized = {
+        name: normalize_key(value) if name in TEXT_PARAMS and isinstance(value, str) else value
+        for name, value in params.items()
+    }
+    if isinstance(normalized.get("companies"), list):
+        normalized["companies"] = [
+            normalize_key(c) if isinstance(c, str) else c for c in normalized["companies"]
+        ]
+    return f"{kind}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call
+    for their key is in flight wait for it and share its result (or its
+    exception). Results are also remembered for `memo_ttl` seconds so a
+    request arriving just after completion doesn't start a new run.
+    """
+
+    def __init__(self, memo_ttl: float = COALESCE_RESULT_TTL, memo_size: int = COALESCE_RESULT_SIZE):
+        self.memo = LRUCache(maxsize=memo_size, ttl=memo_ttl) if memo_ttl > 0 else None
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.runs = 0
+        self.shared = 0
+        self.memo_hits = 0
+
+    def do(self, key: str, fn, cacheable=None):
+        """
+        Return (result, shared) for `fn()` under `key`; `shared` is True when
+        the result came from another caller's run. Results for which
+        `cacheable(result)` is false are shared with waiters but not memoized.
+        """
+        with self._lock:
+            if self.memo is not None:
+                result = self.memo.get(key, _MISSING)
+                if result is not _MISSING:
+                    self.memo_hits += 1
+                    return result, True
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.runs += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            logger.info("Joining in-flight run for %s", key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and self.memo is not None and (
+                        cacheable is None or cacheable(call.result)):
+                    self.memo.set(key, call.result)
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "shared": self.shared,
+                "memo_hits": self.memo_hits,
+                "in_flight": len(self._calls),
+            }
+
+
+_flight = None
+_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide SingleFlight shared by the extraction endpoints."""
+    global _flight
+    with _flight_lock:
+        if _flight is None:
+            _flight = SingleFlight()
+        return _flight
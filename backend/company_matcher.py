@@ -0,0 +1,204 @@
+import logging
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Words shorter than this are ignored by the word-similarity check
+MIN_WORD_LENGTH = 4
+
+
+def normalize_company_name(company_name):
+    """Normalize company name for search queries"""
+    # Remove common location suffixes that might interfere with search
+    name = company_name.strip()
+
+    # Remove HK/Hong Kong suffixes for search but keep for matching
+    search_name = name
+    location_suffixes = ['HK', 'Hong Kong', 'Ltd', 'Limited', 'Co.', 'Inc.', 'Corp.']
+
+    for suffix in location_suffixes:
+        if search_name.endswith(f' {suffix}'):
+            search_name = search_name[:-len(f' {suffix}')].strip()
+        elif search_name.endswith(suffix):
+            search_name = search_name[:-len(suffix)].strip()
+
+    return search_name
+
+
+def similarity_upper_bound(counts_a: Counter, len_a: int, counts_b: Counter, len_b: int) -> float:
+    """SequenceMatcher.quick_ratio() from precomputed character counts."""
+    total = len_a + len_b
+    if not total:
+        return 1.0
+    matches = sum((counts_a & counts_b).values())
+    return 2.0 * matches / total
+
+
+class CompanyMatcher:
+    """
+    Company-name matcher with everything derived from the company name
+    (variations, regexes, word list, character counts) computed once.
+
+    Gives the same accept/reject decisions as the original SequenceMatcher
+    scan: candidates are ruled out by an upper bound on the similarity
+    ratio (shared character counts) and SequenceMatcher only runs where the
+    bound could still reach the threshold or beat the best score so far.
+    """
+
+    def __init__(self, company_name: str, threshold: float = 0.6):
+        self.company_name = company_name
+        self.threshold = threshold
+
+        # Create variations of company name to check
+        base_name = normalize_company_name(company_name)
+        variations = [company_name.lower(), base_name.lower()]
+        if base_name != company_name:
+            variations.append(base_name.lower())
+        # Remove duplicates while preserving order
+        self.variations = list(dict.fromkeys(variations))
+
+        self.patterns = [
+            (v, re.compile(r'\b' + re.escape(v) + r'\b')) for v in self.variations
+        ]
+        self.context_phrases = [
+            (v, (f' at {v}', f'@ {v}', f'at {v}')) for v in self.variations
+        ]
+        self.words = [
+            (word, Counter(word))
+            for v in self.variations for word in v.split()
+            if len(word) >= MIN_WORD_LENGTH
+        ]
+        self.char_counts = [(v, Counter(v)) for v in self.variations]
+
+    def exact_match(self, text_lower: str):
+        for variation, pattern in self.patterns:
+            if pattern.search(text_lower):
+                return variation
+        return None
+
+    def context_match(self, text_lower: str):
+        for variation, phrases in self.context_phrases:
+            if any(phrase in text_lower for phrase in phrases):
+                return variation
+        return None
+
+    def word_match(self, text_lower: str):
+        """First (company word, title word, similarity) pair reaching the threshold."""
+        title_words = text_lower.split()
+        title_counts = {}
+        for company_word, counts in self.words:
+            length = len(company_word)
+            for title_word in title_words:
+                # Length-only bound (real_quick_ratio), then the character-count bound
+                if 2.0 * min(length, len(title_word)) / (length + len(title_word)) < self.threshold:
+                    continue
+                if title_word not in title_counts:
+                    title_counts[title_word] = Counter(title_word)
+                bound = similarity_upper_bound(counts, length, title_counts[title_word], len(title_word))
+                if bound < self.threshold:
+                    continue
+                similarity = SequenceMatcher(None, company_word, title_word).ratio()
+                if similarity >= self.threshold:
+                    return company_word, title_word, similarity
+        return None
+
+    def window_bounds(self, text_lower: str):
+        """
+        Yield (bound, variation_index, offset) for every window the original
+        scan compares. The bound is shared characters / window length, kept
+        up to date incrementally as the window slides.
+        """
+        for index, (variation, counts) in enumerate(self.char_counts):
+            size = len(variation)
+            if size == 0:
+                for i in range(len(text_lower) + 1):
+                    yield 1.0, index, i
+                continue
+            if size > len(text_lower):
+                continue
+
+            window = Counter(text_lower[:size])
+            shared = sum((counts & window).values())
+            for i in range(len(text_lower) - size + 1):
+                if i:
+                    removed, added = text_lower[i - 1], text_lower[i + size - 1]
+                    if removed != added:
+                        window[removed] -= 1
+                        if window[removed] < counts[removed]:
+                            shared -= 1
+                        if window[added] < counts[added]:
+                            shared += 1
+                        window[added] += 1
+                yield shared / size, index, i
+
+    def best_substring(self, text_lower: str):
+        """
+        Best (similarity, segment) over windows of each variation's length.
+        Only windows whose bound reaches the threshold and beats the best
+        score so far are scored, so the accept/reject decision and any
+        accepting score are exact; for a rejected text the score is the best
+        among the windows that could have matched (0 if none could).
+        """
+        best, best_segment = 0, ""
+        floor = self.threshold
+        for bound, index, i in self.window_bounds(text_lower):
+            if bound < floor or bound <= best:
+                continue
+            variation = self.variations[index]
+            segment = text_lower[i:i + len(variation)]
+            similarity = SequenceMatcher(None, variation, segment).ratio()
+            if similarity > best:
+                best, best_segment = similarity, segment
+        return best, best_segment
+
+    def match(self, text: str, verbose: bool = None):
+        """
+        Return (matches, score) for `text`, e.g. a LinkedIn role plus snippet.
+        The match trace is logged at DEBUG; `verbose` defaults to whether
+        that level is enabled, so the trace costs nothing when it is off.
+        """
+        if verbose is None:
+            verbose = logger.isEnabledFor(logging.DEBUG)
+        text_lower = text.lower()
+        if verbose:
+            logger.debug("Checking company variations: %s", self.variations)
+
+        # Check exact matches first (with word boundaries)
+        variation = self.exact_match(text_lower)
+        if variation is not None:
+            if verbose:
+                logger.debug("Exact word match found for '%s'", variation)
+            return True, 1.0
+
+        # Check for "at Company" or "@ Company" patterns (strong indicator)
+        variation = self.context_match(text_lower)
+        if variation is not None:
+            if verbose:
+                logger.debug("Strong context match: 'at %s'", variation)
+            return True, 1.0
+
+        # Check word-by-word similarity (only for words >= 4 characters to avoid false positives)
+        word_match = self.word_match(text_lower)
+        if word_match is not None:
+            company_word, title_word, similarity = word_match
+            if verbose:
+                logger.debug("Word match: '%s' ~ '%s' (similarity: %.2f)",
+                             company_word, title_word, similarity)
+            return True, similarity
+
+        # Check substring similarity
+        max_similarity, best_match = self.best_substring(text_lower)
+        if verbose and max_similarity >= self.threshold:
+            logger.debug("Substring match: '%s' (similarity: %.2f)", best_match, max_similarity)
+        return max_similarity >= self.threshold, max_similarity
+
+
+@lru_cache(maxsize=256)
+def get_matcher(company_name: str, threshold: float = 0.6) -> CompanyMatcher:
+    """Shared precomputed matcher per (company, threshold)."""
+    return CompanyMatcher(company_name, threshold)
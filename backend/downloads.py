@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import importlib.util
+import os
+import re
+import shutil
+import threading
+
+from export_writer import EXPORT_FORMATS, format_from_path
+from paths import get_exports_dir
+
+# Exports smaller than this are sent uncompressed
+DOWNLOAD_COMPRESS_MIN_BYTES = int(os.environ.get('DOWNLOAD_COMPRESS_MIN_BYTES', '1024'))
+# Cache lifetime for content-addressed (versioned) export names
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Formats that are already compressed and are sent as-is
+PRECOMPRESSED_FORMATS = {"csv.gz", "ndjson.gz", "parquet", "parquet.zst"}
+DIGEST_LENGTH = 16
+VERSION_SUFFIX = re.compile(r"\.([0-9a-f]{%d})$" % DIGEST_LENGTH)
+COMPRESSED_DIR = ".compressed"
+ENCODING_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+_digests = {}
+_digest_lock = threading.Lock()
+_compress_lock = threading.Lock()
+
+
+def export_dirs() -> list[str]:
+    """Directories searched for exports: the exports dir, then where older LinkedIn exports went."""
+    base = get_exports_dir()
+    return list(dict.fromkeys([base, os.path.join(base, "exports"), "exports"]))
+
+
+def is_export_name(filename: str) -> bool:
+    """
+    True for names with an export format's extension. The exports dir also
+    holds databases (leads, jobs, caches, rate limits) and in-progress
+    `.tmp`/`.partial` files, which must never be served.
+    """
+    return any(filename.endswith(ext) for ext in EXPORT_FORMATS.values())
+
+
+def find_export(filename: str):
+    """Path of an export by file name, or None. Only plain export file names are accepted."""
+    if (os.path.basename(filename) != filename or filename.startswith(".")
+            or not is_export_name(filename)):
+        return None
+    for directory in export_dirs():
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def file_digest(path: str) -> str:
+    """Content hash of a file, recomputed only when its size or mtime changes."""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()[:DIGEST_LENGTH]
+    with _digest_lock:
+        _digests[path] = (key, digest)
+    return digest
+
+
+def split_versioned_name(filename: str):
+    """'leads.0123456789abcdef.csv' -> ('leads.csv', '0123456789abcdef'); plain names -> (name, None)."""
+    for ext in sorted(EXPORT_FORMATS.values(), key=len, reverse=True):
+        if filename.endswith(ext):
+            stem = filename[:-len(ext)]
+            match = VERSION_SUFFIX.search(stem)
+            if match:
+                return stem[:match.start()] + ext, match.group(1)
+            break
+    return filename, None
+
+
+def versioned_name(path: str) -> str:
+    """Content-addressed name for an export: changes whenever its contents do."""
+    name = os.path.basename(path)
+    ext = EXPORT_FORMATS[format_from_path(name)]
+    return f"{name[:-len(ext)]}.{file_digest(path)}{ext}"
+
+
+def download_url(filename: str) -> str:
+    """Download URL for an export, content-addressed when the file exists."""
+    name = os.path.basename(filename)
+    path = find_export(name)
+    if path is not None:
+        try:
+            name = versioned_name(path)
+        except ValueError:
+            pass
+    return f"/api/download/{name}"
+
+
+def choose_encoding(accept_encoding: str):
+    """'br' or 'gzip' if the client accepts it (brotli only when installed), else None."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    if accepted.get("br", 0) > 0 and importlib.util.find_spec("brotli") is not None:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def should_compress(path: str) -> bool:
+    try:
+        fmt = format_from_path(path)
+    except ValueError:
+        return False
+    return fmt not in PRECOMPRESSED_FORMATS and os.path.getsize(path) >= DOWNLOAD_COMPRESS_MIN_BYTES
+
+
+def compressed_copy(path: str, digest: str, encoding: str) -> str:
+    """
+    Path of `path` compressed with `encoding`, created on first request and
+    kept (keyed by content digest) so later downloads don't recompress.
+    """
+    directory = os.path.join(os.path.dirname(path), COMPRESSED_DIR)
+    name = os.path.basename(path)
+    target = os.path.join(directory, f"{name}.{digest}{ENCODING_EXTENSIONS[encoding]}")
+    if os.path.exists(target):
+        return target
+    with _compress_lock:
+        if os.path.exists(target):
+            return target
+        os.makedirs(directory, exist_ok=True)
+        temp = f"{target}.{os.getpid()}.tmp"
+        if encoding == "br":
+            import brotli
+            with open(path, "rb") as f:
+                data = brotli.compress(f.read())
+            with open(temp, "wb") as out:
+                out.write(data)
+        else:
+            with open(path, "rb") as f, gzip.open(temp, "wb") as out:
+                shutil.copyfileobj(f, out)
+        os.replace(temp, target)
+        # Drop copies of earlier versions of the same export
+        earlier = re.compile(r"%s\.[0-9a-f]{%d}%s$" % (
+            re.escape(name), DIGEST_LENGTH, re.escape(ENCODING_EXTENSIONS[encoding])))
+        for other in os.listdir(directory):
+            if earlier.match(other) and other != os.path.basename(target):
+                os.remove(os.path.join(directory, other))
+    return target
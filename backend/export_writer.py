@@ -0,0 +1,277 @@
+import csv
+import gzip
+import importlib.util
+import itertools
+import json
+import os
+import time
+import uuid
+
+from logging_config import get_logger
+from metrics import observe_stage
+
+logger = get_logger(__name__)
+
+# Fixed export schemas, independent of which fields a given row happens to have
+LEAD_FIELDS = ("name", "address", "phone", "website", "price_level", "rating", "user_ratings_total")
+PROFILE_FIELDS = ("Company", "Name", "Title", "LinkedIn_URL", "Location",
+                  "Connection_Level", "Experience")
+
+# Numeric columns in the typed (columnar) formats; everything else is a string
+COLUMN_TYPES = {"price_level": "int64", "rating": "float64", "user_ratings_total": "int64"}
+
+# Export format -> file extension
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "ndjson": ".ndjson",
+    "ndjson.gz": ".ndjson.gz",
+    "parquet": ".parquet",
+    "parquet.zst": ".zst.parquet",
+    "arrow": ".arrow",
+}
+# Columnar formats (need pyarrow) -> compression codec
+COLUMNAR_FORMATS = {"parquet": "snappy", "parquet.zst": "zstd", "arrow": None}
+EXPORT_FORMAT = os.environ.get('EXPORT_FORMAT', 'csv')
+# Rows buffered between flushes to disk; columnar formats write one row group
+# (record batch) per flush, so they buffer more
+EXPORT_FLUSH_ROWS = int(os.environ.get('EXPORT_FLUSH_ROWS', '100'))
+EXPORT_COLUMNAR_FLUSH_ROWS = int(os.environ.get('EXPORT_COLUMNAR_FLUSH_ROWS', '5000'))
+
+
+def export_extension(fmt: str = None) -> str:
+    fmt = fmt or EXPORT_FORMAT
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+    return EXPORT_FORMATS[fmt]
+
+
+def check_export_format(fmt: str):
+    """Error message if `fmt` can't be written here, else None."""
+    if fmt not in EXPORT_FORMATS:
+        return f"export_format must be one of: {', '.join(EXPORT_FORMATS)}"
+    if fmt in COLUMNAR_FORMATS and importlib.util.find_spec("pyarrow") is None:
+        return f"The {fmt} export format requires pyarrow, which is not installed"
+    return None
+
+
+def format_from_path(path: str) -> str:
+    """Export format of an existing file, from its extension (longest match wins)."""
+    matches = [fmt for fmt, ext in EXPORT_FORMATS.items() if path.endswith(ext)]
+    if not matches:
+        raise ValueError(f"Not an export file: {os.path.basename(path)}")
+    return max(matches, key=lambda fmt: len(EXPORT_FORMATS[fmt]))
+
+
+def to_number(value, arrow_type: str):
+    """Numeric cell value, or None for blanks and anything unparseable."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(float(value)) if arrow_type == "int64" else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ColumnarFile:
+    """Typed Parquet or Arrow IPC file, written one record batch at a time (needs pyarrow)."""
+
+    def __init__(self, path: str, fields, fmt: str):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError(f"The {fmt} export format requires pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.fields = fields
+        self.schema = pa.schema([(f, COLUMN_TYPES.get(f, "string")) for f in fields])
+        if fmt.startswith("parquet"):
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression=COLUMNAR_FORMATS[fmt])
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write_rows(self, rows: list[dict]):
+        columns = {}
+        for field in self.fields:
+            arrow_type = COLUMN_TYPES.get(field)
+            if arrow_type:
+                columns[field] = [to_number(row[field], arrow_type) for row in rows]
+            else:
+                columns[field] = [None if row[field] is None else str(row[field]) for row in rows]
+        self._writer.write_batch(self.pa.RecordBatch.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class ExportWriter:
+    """
+    Streams rows with a fixed schema to `<path>.<pid>-<id>.tmp`, flushing every
+    `flush_rows` rows, and renames it to `path` on commit() so readers never
+    see a half-written export. If the run fails, rows written so far are
+    kept as `<path>.<pid>-<id>.partial`. Usable as a context manager.
+
+    Columnar formats buffer `flush_rows` rows (default
+    EXPORT_COLUMNAR_FLUSH_ROWS) and write each chunk as one row group.
+    """
+
+    def __init__(self, path: str, fields, fmt: str = None, flush_rows: int = None):
+        self.fmt = fmt or EXPORT_FORMAT
+        export_extension(self.fmt)
+        self.path = path
+        self.fields = tuple(fields)
+        if flush_rows is None:
+            flush_rows = (EXPORT_COLUMNAR_FLUSH_ROWS if self.fmt in COLUMNAR_FORMATS
+                          else EXPORT_FLUSH_ROWS)
+        self.flush_rows = max(1, flush_rows)
+        self.rows_written = 0
+        self._pending = []
+        self._unflushed = 0
+        self._closed = False
+        # Time spent writing and flushing, reported as the export_write stage
+        self.write_seconds = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Unique per writer: two runs in one process can write the same export name
+        suffix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.temp_path = f"{path}.{suffix}.tmp"
+        self.partial_path = f"{path}.{suffix}.partial"
+        self._file = None
+        self._columnar = None
+        self._csv = None
+        if self.fmt in COLUMNAR_FORMATS:
+            self._columnar = ColumnarFile(self.temp_path, self.fields, self.fmt)
+        elif self.fmt.endswith(".gz"):
+            self._file = gzip.open(self.temp_path, "wt", newline="", encoding="utf-8")
+        else:
+            self._file = open(self.temp_path, "w", newline="", encoding="utf-8")
+        if self.fmt.startswith("csv"):
+            self._csv = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction="ignore")
+            self._csv.writeheader()
+        logger.debug("📁 Writing %s export to: %s", self.fmt, path)
+
+    def write(self, row: dict):
+        started = time.perf_counter()
+        row = {field: row.get(field, "") for field in self.fields}
+        if self._columnar is not None:
+            self._pending.append(row)
+        elif self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        self.rows_written += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_rows:
+            self.flush()
+        self.write_seconds += time.perf_counter() - started
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if self._columnar is not None:
+            if self._pending:
+                self._columnar.write_rows(self._pending)
+                self._pending = []
+        else:
+            self._file.flush()
+        self._unflushed = 0
+
+    def _close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self._columnar is not None:
+            self._columnar.close()
+        else:
+            self._file.close()
+
+    def commit(self) -> str:
+        """Finish the file and move it into place; returns the final path."""
+        started = time.perf_counter()
+        self._close()
+        os.replace(self.temp_path, self.path)
+        observe_stage("export_write", self.write_seconds + time.perf_counter() - started)
+        logger.info("✅ Saved %d rows to %s", self.rows_written, self.path)
+        return self.path
+
+    def abort(self):
+        """Close after a failure, keeping any rows written in `partial_path`."""
+        try:
+            self._close()
+        except Exception as e:
+            logger.warning("⚠️  Could not finish %s: %s", self.temp_path, e)
+        if self.rows_written:
+            os.replace(self.temp_path, self.partial_path)
+            logger.warning("⚠️  Export incomplete, %d rows kept in %s",
+                           self.rows_written, self.partial_path)
+        else:
+            os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def _rows_then_close(rows, f):
+    with f:
+        yield from rows
+
+
+def read_export(path: str):
+    """Return (fields, row iterator) for an existing export file in any format, read lazily."""
+    fmt = format_from_path(path)
+    if fmt in COLUMNAR_FORMATS:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError(f"Reading {fmt} exports requires pyarrow (pip install pyarrow)")
+        if fmt.startswith("parquet"):
+            source = pq.ParquetFile(path)
+            batches = source.iter_batches()
+            fields = source.schema_arrow.names
+        else:
+            reader = pa.ipc.open_file(pa.memory_map(path))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            fields = reader.schema.names
+        return fields, (row for batch in batches for row in batch.to_pylist())
+
+    opener = gzip.open if fmt.endswith(".gz") else open
+    f = opener(path, "rt", newline="", encoding="utf-8")
+    if fmt.startswith("csv"):
+        reader = csv.DictReader(f)
+        return reader.fieldnames or [], _rows_then_close(reader, f)
+    rows = (json.loads(line) for line in f if line.strip())
+    first = next(rows, None)
+    if first is None:
+        f.close()
+        return [], iter(())
+    return list(first), _rows_then_close(itertools.chain([first], rows), f)
+
+
+def convert_export(path: str, fmt: str) -> str:
+    """
+    Path of `path` converted to `fmt`, written next to it. An existing
+    conversion at least as new as the source is reused.
+    """
+    source_fmt = format_from_path(path)
+    if fmt == source_fmt:
+        return path
+    target = path[:-len(EXPORT_FORMATS[source_fmt])] + export_extension(fmt)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+        return target
+    fields, rows = read_export(path)
+    with ExportWriter(target, fields, fmt=fmt) as writer:
+        writer.write_many(rows)
+    return target
@@ -0,0 +1,183 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cassette import get_cassette
+from metrics import Gauge, LatencyHistogram
+from rate_limit import get_budget, get_limiter
+
+# Keep-alive connection pool sizes per host; other hosts use the default
+DEFAULT_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '10'))
+HOST_POOL_SIZES = {
+    "maps.googleapis.com": int(os.environ.get('HTTP_POOL_SIZE_MAPS', '16')),
+    "www.googleapis.com": int(os.environ.get('HTTP_POOL_SIZE_SEARCH', '8')),
+}
+
+# Retries on rate limiting and server errors, with jittered exponential backoff
+MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', '8'))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Maps APIs report rate limiting in the JSON body of a 200 response
+THROTTLED_API_STATUS = "OVER_QUERY_LIMIT"
+
+# Send Google API calls to another server instead, e.g. the local stub used by
+# benchmarks/extraction.py ("http://127.0.0.1:8765"); empty for the real APIs
+API_BASE_URL = os.environ.get('GOOGLE_API_BASE_URL', '')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+_histograms = {}
+calls_in_flight = Gauge()
+_status_counts = {}
+_stats_lock = threading.Lock()
+
+
+def get_histogram(endpoint: str) -> LatencyHistogram:
+    with _stats_lock:
+        if endpoint not in _histograms:
+            _histograms[endpoint] = LatencyHistogram()
+        return _histograms[endpoint]
+
+
+def record_call(endpoint: str, status, seconds: float):
+    get_histogram(endpoint).observe(seconds)
+    with _stats_lock:
+        key = (endpoint, str(status))
+        _status_counts[key] = _status_counts.get(key, 0) + 1
+
+
+def latency_stats() -> dict:
+    """Per-endpoint latency histograms and call counts by status."""
+    with _stats_lock:
+        endpoints = dict(_histograms)
+        counts = dict(_status_counts)
+    stats = {}
+    for endpoint, histogram in endpoints.items():
+        stats[endpoint] = histogram.snapshot()
+        stats[endpoint]["status"] = {
+            status: n for (name, status), n in counts.items() if name == endpoint
+        }
+    return stats
+
+
+def get_session() -> requests.Session:
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=len(HOST_POOL_SIZES) + 2,
+                                                  pool_maxsize=DEFAULT_POOL_SIZE))
+            for host, size in HOST_POOL_SIZES.items():
+                session.mount(f"https://{host}/", HTTPAdapter(pool_connections=1, pool_maxsize=size))
+            if API_BASE_URL:
+                session.mount(API_BASE_URL, HTTPAdapter(pool_connections=1,
+                                                        pool_maxsize=max(HOST_POOL_SIZES.values())))
+            _session = session
+        return _session
+
+
+def resolve_url(url: str) -> str:
+    """`url`, re-pointed at API_BASE_URL when that is set and `url` is a Google API host."""
+    if not API_BASE_URL:
+        return url
+    parsed = urlparse(url)
+    if parsed.hostname not in HOST_POOL_SIZES:
+        return url
+    return API_BASE_URL.rstrip("/") + parsed._replace(scheme="", netloc="").geturl()
+
+
+def backoff_delay(attempt: int, retry_after: str = None) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(endpoint: str, url: str, params: dict = None, timeout: float = 10) -> requests.Response:
+    """
+    GET `url` through the shared session. `endpoint` labels the call in the
+    latency stats. 429/5xx responses and connection errors are retried up
+    to MAX_RETRIES times; the last response (or exception) is returned (raised).
+
+    Each attempt waits for the endpoint's shared token bucket (rate_limit.py),
+    which slows down when Google answers 429 and recovers on success. An
+    endpoint with a daily quota raises QuotaExceededError once it is used up.
+
+    With HTTP_CASSETTE_MODE=record the final response is also saved to the
+    cassette; with replay it is answered from the cassette instead (see
+    cassette.py), raising CassetteMiss for a request that wasn't recorded.
+    """
+    if not endpoint:
+        endpoint = urlparse(url).path
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        resp, elapsed = cassette.play(url, params)
+        record_call(endpoint, resp.status_code, elapsed)
+        return resp
+
+    budget = get_budget(endpoint)
+    if budget is not None:
+        budget.consume()
+    started = time.perf_counter()
+    calls_in_flight.add(endpoint)
+    try:
+        resp = send(endpoint, resolve_url(url), params, timeout)
+    finally:
+        calls_in_flight.add(endpoint, -1)
+    if cassette is not None:
+        cassette.record(url, params, resp, time.perf_counter() - started)
+    return resp
+
+
+def send(endpoint: str, url: str, params: dict, timeout: float) -> requests.Response:
+    """The network part of get(): the request with retries and backoff."""
+    session = get_session()
+    limiter = get_limiter(endpoint)
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter is not None:
+            limiter.wait()
+        started = time.perf_counter()
+        try:
+            resp = session.get(url, params=params, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            record_call(endpoint, type(e).__name__, time.perf_counter() - started)
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        record_call(endpoint, resp.status_code, time.perf_counter() - started)
+        if limiter is not None:
+            if resp.status_code == 429:
+                limiter.throttled()
+            elif resp.status_code < 500:
+                limiter.succeeded()
+        if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return resp
+        time.sleep(backoff_delay(attempt, resp.headers.get("Retry-After")))
+
+
+def get_json(endpoint: str, url: str, params: dict = None, timeout: float = 10) -> dict:
+    """get() decoded as JSON, also retrying (with backoff) an OVER_QUERY_LIMIT status."""
+    for attempt in range(MAX_RETRIES + 1):
+        data = get(endpoint, url, params=params, timeout=timeout).json()
+        if not isinstance(data, dict) or data.get("status") != THROTTLED_API_STATUS:
+            return data
+        limiter = get_limiter(endpoint)
+        if limiter is not None:
+            limiter.throttled()
+        if attempt < MAX_RETRIES:
+            time.sleep(backoff_delay(attempt))
+    return data
@@ -0,0 +1,287 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '20'))
+JOB_TTL = float(os.environ.get('JOB_TTL', str(24 * 3600)))
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested."""
+
+
+def new_job(kind: str, params: dict) -> dict:
+    return {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "params": params,
+        "status": QUEUED,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "progress": None,
+        "partial_results": [],
+        "result": None,
+        "error": None,
+        "cancel_requested": False,
+    }
+
+
+def job_timings(job: dict) -> dict:
+    """Queue wait and run time in seconds for a job record."""
+    now = time.time()
+    started = job.get("started_at")
+    finished = job.get("finished_at")
+    return {
+        "queued_seconds": (started or finished or now) - job["created_at"],
+        "running_seconds": ((finished or now) - started) if started else 0.0,
+    }
+
+
+class MemoryJobStore:
+    """Job records held in a process-local dict."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._jobs[job["id"]] = job
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, partial_results=list(job["partial_results"])) if job else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return bool(job and job["cancel_requested"])
+
+    def append_result(self, job_id: str, item):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id]["partial_results"].append(item)
+
+    def purge(self, older_than: float):
+        with self._lock:
+            for job_id in [j["id"] for j in self._jobs.values()
+                           if j["finished_at"] and j["finished_at"] < older_than]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """Job records in a SQLite file, visible to every worker process on the host."""
+
+    COLUMNS = ("id", "kind", "params", "status", "created_at", "started_at",
+               "finished_at", "progress", "partial_results", "result", "error",
+               "cancel_requested")
+    JSON_COLUMNS = {"params", "progress", "partial_results", "result"}
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT, params TEXT, status TEXT, "
+                "created_at REAL, started_at REAL, finished_at REAL, progress TEXT, "
+                "partial_results TEXT, result TEXT, error TEXT, cancel_requested INTEGER)"
+            )
+
+    def _encode(self, column, value):
+        return json.dumps(value) if column in self.JSON_COLUMNS else value
+
+    def create(self, job: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+                [self._encode(c, job.get(c)) for c in self.COLUMNS],
+            )
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = {
+            c: json.loads(v) if c in self.JSON_COLUMNS and v is not None else v
+            for c, v in zip(self.COLUMNS, row)
+        }
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def update(self, job_id: str, **fields):
+        if not fields:
+            return
+        assignments = ", ".join(f"{c} = ?" for c in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                [self._encode(c, v) for c, v in fields.items()] + [job_id],
+            )
+
+    def append_result(self, job_id: str, item):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET partial_results = json_insert(partial_results, '$[#]', json(?)) "
+                "WHERE id = ?",
+                (json.dumps(item), job_id),
+            )
+
+    def purge(self, older_than: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (older_than,)
+            )
+
+
+class JobContext:
+    """Handle passed to a running job for reporting results and checking cancellation."""
+
+    def __init__(self, manager, job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        return self.manager.is_cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+    def add_result(self, item):
+        """Publish a partial result; raises JobCancelled if the job was cancelled."""
+        self.check_cancelled()
+        self.manager.store.append_result(self.job_id, item)
+
+    def set_progress(self, progress):
+        self.manager.store.update(self.job_id, progress=progress)
+
+
+class JobManager:
+    """
+    Runs registered job functions on a bounded worker pool.
+    A job function is called as fn(params, context) and returns a JSON-able result.
+    """
+
+    def __init__(self, store, max_workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_SIZE):
+        self.store = store
+        self.max_queue = max_queue
+        self._handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._outstanding = 0
+
+    def register(self, kind: str, fn):
+        self._handlers[kind] = fn
+
+    def submit(self, kind: str, params: dict) -> dict:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            if self._outstanding >= self.max_queue:
+                raise QueueFullError(f"Job queue is full ({self.max_queue} jobs)")
+            self._outstanding += 1
+        job = new_job(kind, params)
+        self.store.create(job)
+        self._executor.submit(self._run, job["id"], kind, params)
+        self.store.purge(time.time() - JOB_TTL)
+        return job
+
+    def get(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is not None:
+            job["timings"] = job_timings(job)
+        return job
+
+    def cancel(self, job_id: str):
+        """Request cancellation. Queued jobs never start; running jobs stop at their next check."""
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        self.store.update(job_id, cancel_requested=True)
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return self.store.is_cancel_requested(job_id)
+
+    def _finish(self, job_id: str, status: str, **fields):
+        self.store.update(job_id, status=status, finished_at=time.time(), **fields)
+
+    def _run(self, job_id: str, kind: str, params: dict):
+        try:
+            if self.is_cancel_requested(job_id):
+                self._finish(job_id, CANCELLED)
+                return
+            self.store.update(job_id, status=RUNNING, started_at=time.time())
+            context = JobContext(self, job_id)
+            try:
+                result = self._handlers[kind](params, context)
+            except JobCancelled:
+                self._finish(job_id, CANCELLED)
+                return
+            except Exception as e:
+                logger.error("❌ Job %s (%s) failed: %s", job_id, kind, e,
+                             extra={'job_id': job_id, 'kind': kind})
+                self._finish(job_id, FAILED, error=str(e))
+                return
+            if context.cancelled:
+                self._finish(job_id, CANCELLED)
+            else:
+                self._finish(job_id, SUCCEEDED, result=result)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+
+
+def create_job_store(backend: str = None, path: str = None):
+    """Build the store named by JOB_STORE ("memory" or "sqlite", stored at JOB_STORE_PATH)."""
+    backend = (backend or os.environ.get('JOB_STORE', 'memory')).lower()
+    if backend == "sqlite":
+        return SQLiteJobStore(os.environ.get('JOB_STORE_PATH') or path or 'jobs.sqlite3')
+    if backend == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown job store backend: {backend}")
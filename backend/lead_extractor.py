@@ -1,35 +1,143 @@
 import os
-import csv
 import time
-import requests
 import math
-from urllib.parse import urlencode
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import http_client
+from cassette import replaying
+from area_search import PLACES_RESULT_CAP, tiled_search
+from cache import TieredCache, is_expired, normalize_key
+from export_writer import LEAD_FIELDS, ExportWriter, export_extension
+from paths import get_exports_dir
+from lead_store import get_lead_store
+from rate_limit import QuotaExceededError, RateLimiter
+from logging_config import get_logger
 
-# Use environment variable for API key
+logger = get_logger(__name__)
+
+# Use environment variable for API key (checked on first use, see get_api_key)
 API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY')
 
-# Validate that required environment variable is set
-if not API_KEY:
-    raise ValueError("Missing required environment variable: GOOGLE_MAPS_API_KEY")
+# Concurrency settings for Places Details lookups
+DETAILS_MAX_WORKERS = int(os.environ.get('DETAILS_MAX_WORKERS', '4'))
+
+# next_page_token warm-up: first delay and retry budget on INVALID_REQUEST
+PAGE_TOKEN_DELAY = float(os.environ.get('PAGE_TOKEN_DELAY', '0.5'))
+PAGE_TOKEN_MAX_ATTEMPTS = int(os.environ.get('PAGE_TOKEN_MAX_ATTEMPTS', '6'))
+
+# Geocode cache: in-process LRU backed by SQLite in the exports dir
+GEOCODE_CACHE_SIZE = int(os.environ.get('GEOCODE_CACHE_SIZE', '512'))
+GEOCODE_CACHE_TTL = float(os.environ.get('GEOCODE_CACHE_TTL', str(30 * 24 * 3600)))
+GEOCODE_CACHE_PATH = os.environ.get('GEOCODE_CACHE_PATH')
+
+# Reuse lead store details fetched within this many seconds (0 disables)
+LEAD_REUSE_MAX_AGE = float(os.environ.get('LEAD_REUSE_MAX_AGE', str(3 * 24 * 3600)))
+# refresh_leads re-fetches details older than this many seconds
+LEAD_REFRESH_MAX_AGE = float(os.environ.get('LEAD_REFRESH_MAX_AGE', str(7 * 24 * 3600)))
+
+# Place details cache, keyed by place_id and requested field set
+DETAILS_CACHE_SIZE = int(os.environ.get('DETAILS_CACHE_SIZE', '2048'))
+DETAILS_CACHE_TTL = float(os.environ.get('DETAILS_CACHE_TTL', str(24 * 3600)))
+DETAILS_CACHE_STALE_TTL = float(os.environ.get('DETAILS_CACHE_STALE_TTL', '0'))
+DETAILS_CACHE_PATH = os.environ.get('DETAILS_CACHE_PATH')
+
+DETAILS_FIELDS = [
+    "name",
+    "formatted_address",
+    "international_phone_number",
+    "website",
+    "price_level",
+    "rating",
+    "user_ratings_total",
+    "geometry",
+]
+
+_geocode_cache = None
+_details_cache = None
+_cache_lock = threading.Lock()
+
+def get_api_key() -> str:
+    """
+    GOOGLE_MAPS_API_KEY, validated when a Maps request is first made rather
+    than at import, so the module loads (and the app starts) without it.
+    """
+    key = API_KEY or os.environ.get('GOOGLE_MAPS_API_KEY')
+    if not key and replaying():
+        return "replay"
+    if not key:
+        raise ValueError("Missing required environment variable: GOOGLE_MAPS_API_KEY")
+    return key
+
+def get_geocode_cache() -> TieredCache:
+    """Create the geocode cache on first use. Set GEOCODE_CACHE_PATH="" for memory only."""
+    global _geocode_cache
+    with _cache_lock:
+        if _geocode_cache is None:
+            path = GEOCODE_CACHE_PATH
+            if path is None:
+                path = os.path.join(get_exports_dir(), "geocode_cache.sqlite3")
+            _geocode_cache = TieredCache("geocode", maxsize=GEOCODE_CACHE_SIZE,
+                                         ttl=GEOCODE_CACHE_TTL, path=path,
+                                         max_disk_entries=GEOCODE_CACHE_SIZE * 10)
+        return _geocode_cache
+
+def get_details_cache() -> TieredCache:
+    """
+    Create the place details cache on first use. DETAILS_CACHE_STALE_TTL > 0
+    serves expired entries for that long while refreshing them in the background.
+    """
+    global _details_cache
+    with _cache_lock:
+        if _details_cache is None:
+            path = DETAILS_CACHE_PATH
+            if path is None:
+                path = os.path.join(get_exports_dir(), "details_cache.sqlite3")
+            _details_cache = TieredCache("place_details", maxsize=DETAILS_CACHE_SIZE,
+                                         ttl=DETAILS_CACHE_TTL, path=path,
+                                         stale_ttl=DETAILS_CACHE_STALE_TTL,
+                                         max_disk_entries=DETAILS_CACHE_SIZE * 10)
+        return _details_cache
 
 def geocode_address(address: str) -> tuple[float, float]:
-    """Geocode an address to get lat/lng coordinates."""
-    geocode_url = (
-        "https://maps.googleapis.com/maps/api/geocode/json?"
-        + urlencode({"address": address, "key": API_KEY})
-    )
-    resp = requests.get(geocode_url, timeout=10).json()
+    """Geocode an address to get lat/lng coordinates (cached by normalized address)."""
+    cache = get_geocode_cache()
+    key = normalize_key(address)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1]
+
+    geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
+    resp = http_client.get_json("geocode", geocode_url,
+                                params={"address": address, "key": get_api_key()}, timeout=10)
     results = resp.get("results")
     if not results:
         raise ValueError(f"Geocode failed for '{address}': {resp.get('status')}")
     loc = results[0]["geometry"]["location"]
+    cache.set(key, [loc["lat"], loc["lng"]])
     return loc["lat"], loc["lng"]
 
-def nearby_search(lat: float, lng: float, keyword: str, radius: int = 500, limit: int = 5):
-    """Search for places near the given coordinates."""
+def fetch_nearby_page(params: dict) -> dict:
+    """
+    Fetch one Nearby Search page.
+    A fresh next_page_token answers INVALID_REQUEST until it becomes valid,
+    so token requests are retried with short, growing delays.
+    """
     base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    delay = PAGE_TOKEN_DELAY
+    for attempt in range(max(1, PAGE_TOKEN_MAX_ATTEMPTS)):
+        if "pagetoken" in params:
+            time.sleep(delay)
+            delay = min(delay * 1.5, 2.0)
+        resp = http_client.get_json("nearbysearch", base_url, params=params, timeout=10)
+        if "pagetoken" not in params or resp.get("status") != "INVALID_REQUEST":
+            return resp
+    return resp
+
+def nearby_search_pages(lat: float, lng: float, keyword: str, radius: int = 500, limit: int = 5):
+    """Search for places near the given coordinates, yielding one list per result page."""
     params = {
-        "key": API_KEY,
+        "key": get_api_key(),
         "location": f"{lat},{lng}",
         "keyword": keyword,
         "radius": radius,
@@ -37,24 +145,27 @@ def nearby_search(lat: float, lng: float, keyword: str, radius: int = 500, limit
 
     places_found = 0
     while places_found < limit:
-        resp = requests.get(base_url, params=params, timeout=10).json()
-        
-        for place in resp.get("results", []):
-            if places_found >= limit:
-                break
-            yield place
-            places_found += 1
-        
+        resp = fetch_nearby_page(params)
+
+        page = resp.get("results", [])[:limit - places_found]
+        places_found += len(page)
+        if page:
+            yield page
+
         # Break if we've found enough places or there's no next page
         if places_found >= limit:
             break
-            
+
         next_token = resp.get("next_page_token")
         if not next_token:
             break
-            
-        time.sleep(2)
-        params = {"key": API_KEY, "pagetoken": next_token}
+
+        params = {"key": get_api_key(), "pagetoken": next_token}
+
+def nearby_search(lat: float, lng: float, keyword: str, radius: int = 500, limit: int = 5):
+    """Search for places near the given coordinates."""
+    for page in nearby_search_pages(lat, lng, keyword, radius=radius, limit=limit):
+        yield from page
 
 def normalize_address(address: str) -> str:
     """Normalize address format."""
@@ -65,122 +176,357 @@ def normalize_address(address: str) -> str:
         parts = parts[1:] + [parts[0]]
     return ", ".join([p for p in parts if p])
 
-def get_place_details(place_id: str) -> dict:
-    """Get detailed information about a place."""
+def details_cache_key(place_id: str, fields) -> str:
+    return f"{place_id}|{','.join(sorted(fields))}"
+
+def fetch_place_details(place_id: str, fields) -> dict:
+    """Call the Places Details API, bypassing the cache."""
     details_url = "https://maps.googleapis.com/maps/api/place/details/json"
     params = {
-        "key": API_KEY,
+        "key": get_api_key(),
         "place_id": place_id,
-        "fields": ",".join([
-            "name",
-            "formatted_address",
-            "international_phone_number",
-            "website",
-            "price_level",
-            "rating",
-            "user_ratings_total",
-            "geometry",
-        ])
+        "fields": ",".join(fields),
     }
-    resp = requests.get(details_url, params=params, timeout=10).json()
+    resp = http_client.get_json("details", details_url, params=params, timeout=10)
     return resp.get("result", {})
 
+def get_place_details(place_id: str, fields=None) -> dict:
+    """
+    Get detailed information about a place.
+    A request for a subset of DETAILS_FIELDS is answered from a cached
+    full-field entry when one exists.
+    """
+    fields = list(fields or DETAILS_FIELDS)
+    cache = get_details_cache()
+
+    if set(fields) < set(DETAILS_FIELDS):
+        full = cache.get_entry(details_cache_key(place_id, DETAILS_FIELDS))
+        if full is not None and not is_expired(full[1], cache.ttl):
+            cache.record_hit()
+            return {k: v for k, v in full[0].items() if k in fields}
+
+    return cache.get_or_load(
+        details_cache_key(place_id, fields),
+        lambda: fetch_place_details(place_id, fields),
+        cacheable=bool,
+    )
+
 def save_csv(rows: list[dict], filename: str):
-    """Write list of dicts to CSV."""
+    """Write a complete list of lead rows to CSV (extractions stream through ExportWriter)."""
     if not rows:
-        print("No data to save.")
+        logger.info("No data to save.")
         return
     
     try:
-        # Ensure the directory exists
-        dir_path = os.path.dirname(filename) if os.path.dirname(filename) else '/tmp'
-        os.makedirs(dir_path, exist_ok=True)
-        print(f"📁 Writing CSV to: {filename}")
-        
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
-        print(f"✅ Saved {len(rows)} rows to {filename}")
+        with ExportWriter(filename, LEAD_FIELDS, fmt="csv") as writer:
+            writer.write_many(rows)
     except Exception as e:
-        print(f"❌ Error saving CSV: {e}")
+        logger.error("❌ Error saving CSV: %s", e)
         raise e
-    print(f"✅ Saved {len(rows)} rows to {filename}")
 
-def extract_leads(keywords: str, location: str, category: str = "") -> dict:
+def build_record(details: dict) -> dict:
+    """Flatten a Places Details result into a CSV row."""
+    return {
+        "name": details.get("name", ""),
+        "address": normalize_address(details.get("formatted_address", "")),
+        "phone": details.get("international_phone_number", ""),
+        "website": details.get("website", ""),
+        "price_level": details.get("price_level", ""),
+        "rating": details.get("rating", ""),
+        "user_ratings_total": details.get("user_ratings_total", ""),
+    }
+
+def iter_place_details(pages, max_workers: int = DETAILS_MAX_WORKERS,
+                       requests_per_second: float = 0,
+                       pipelined: bool = True, fetch=None):
+    """
+    Fetch details for every place in `pages` (an iterable of place lists)
+    with `fetch(place_id)` (get_place_details by default).
+    Yields (place, details, error) tuples in input order as soon as each
+    lookup at the head of the queue finishes. In pipelined mode the next
+    page is fetched in the background while the current page's details run.
+    A used-up daily quota (QuotaExceededError) is raised, not yielded.
+    Closing the generator early cancels the lookups that haven't started.
+    """
+    limiter = RateLimiter(requests_per_second)
+    page_iter = iter(pages)
+    pending = deque()
+    fetch = fetch or get_place_details
+
+    def fetch_details(place: dict) -> dict:
+        limiter.wait()
+        return fetch(place["place_id"])
+
+    def resolve(place, future):
+        try:
+            return place, future.result(), None
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            return place, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor, \
+            ThreadPoolExecutor(max_workers=1) as page_executor:
+
+        def request_page():
+            if pipelined:
+                return page_executor.submit(next, page_iter, None)
+            future = Future()
+            future.set_result(next(page_iter, None))
+            return future
+
+        try:
+            next_page = request_page()
+            while next_page is not None or pending:
+                waiting = [next_page] if next_page is not None else []
+                if pending:
+                    waiting.append(pending[0][1])
+                wait(waiting, return_when=FIRST_COMPLETED)
+
+                while pending and pending[0][1].done():
+                    yield resolve(*pending.popleft())
+
+                if next_page is not None and next_page.done():
+                    page = next_page.result()
+                    if page is None:
+                        next_page = None
+                    else:
+                        for place in page:
+                            pending.append((place, executor.submit(fetch_details, place)))
+                        next_page = request_page()
+        except BaseException:
+            # Closed early (GeneratorExit from a cancelled job or stream) or
+            # failed: drop the queued lookups instead of waiting for them
+            executor.shutdown(wait=False, cancel_futures=True)
+            page_executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+def log_tile_progress(tile: dict):
+    status = "split" if tile["split"] else "done"
+    if tile["error"]:
+        status = f"failed: {tile['error']}"
+    logger.info("🧩 Tile %d/%d (%.5f, %.5f, r=%.0fm): %d found, %d new, %s",
+                tile['completed'], tile['total'], tile['lat'], tile['lng'], tile['radius'],
+                tile['found'], tile['new'], status)
+
+def search_pages(keywords: str, location: str, bounds: dict = None, polygon: list = None,
+                 tile_radius: int = 500, max_workers: int = DETAILS_MAX_WORKERS, progress=None):
+    """Pages of places for a search: tiled over bounds/polygon, or around the geocoded location."""
+    if bounds is not None or polygon is not None:
+        logger.info("🧩 Tiled search for '%s' in %s...", keywords, location)
+
+        def search_tile(tile_lat, tile_lng, radius):
+            return list(nearby_search(tile_lat, tile_lng, keywords,
+                                      radius=int(radius), limit=PLACES_RESULT_CAP))
+
+        return tiled_search(search_tile, bounds=bounds, polygon=polygon,
+                            radius=tile_radius, max_workers=max_workers,
+                            progress=progress or log_tile_progress)
+
+    logger.debug("🔍 Geocoding location: %s...", location)
+    lat, lng = geocode_address(location)
+    logger.debug("➜ %s → %.5f, %.5f", location, lat, lng)
+
+    logger.info("📡 Searching for '%s' near %s...", keywords, location)
+    limit = 5  # Set limit to 5 as requested
+    return nearby_search_pages(lat, lng, keywords, limit=limit)
+
+def export_filename(keywords: str, export_format: str = None) -> str:
+    """Export path for a keyword search, named after the keywords."""
+    # Create filename based on keywords
+    safe_keywords = "".join(c for c in keywords if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    safe_keywords = safe_keywords.replace(' ', '_')
+    
+    base_dir = get_exports_dir()
+    # Ensure directory exists
+    os.makedirs(base_dir, exist_ok=True)
+    return f"{base_dir}/{safe_keywords}{export_extension(export_format)}"
+
+def extract_leads(keywords: str, location: str, category: str = "",
+                  max_workers: int = DETAILS_MAX_WORKERS,
+                  requests_per_second: float = 0,
+                  pipelined: bool = True, bounds: dict = None, polygon: list = None,
+                  tile_radius: int = 500, progress=None, on_record=None,
+                  reuse_max_age: float = LEAD_REUSE_MAX_AGE, export_format: str = None) -> dict:
     """
     Extract leads based on keywords and location.
+    Place details are fetched concurrently by up to `max_workers` threads,
+    within the shared per-endpoint rate limits (rate_limit.py); a positive
+    `requests_per_second` also caps this run on its own. With `pipelined`, the next
+    search page is requested while the current page's details are fetched.
+
+    Passing `bounds` ({south, west, north, east}) or `polygon` ([(lat, lng), ...])
+    switches to tiled mode: the area is covered with overlapping searches of
+    `tile_radius` meters, run concurrently and deduplicated by place_id.
+    `progress` receives a dict per finished tile and `on_record` each
+    record as soon as it is built.
+
+    Every lead is saved to the local lead store; places stored within the
+    last `reuse_max_age` seconds are taken from there without an API call
+    (and keep their original fetch time, so they still go stale).
+    Records are streamed to the export file (`export_format`, default
+    EXPORT_FORMAT) as they are built.
     Returns a dictionary with extraction results.
     """
     try:
-        print(f"🔍 Geocoding location: {location}...")
-        lat, lng = geocode_address(location)
-        print(f"   ➜ {location} → {lat:.5f}, {lng:.5f}")
+        store = get_lead_store()
+        # place_id -> when the details used were fetched from the API (the cache
+        # entry's time for details-cache hits); reused stored leads are absent
+        fetched_at = {}
+        fetched_lock = threading.Lock()
 
-        print(f"📡 Searching for '{keywords}' near {location}...")
-        records = []
-        limit = 5  # Set limit to 5 as requested
-        
-        for place in nearby_search(lat, lng, keywords, limit=limit):
-            try:
-                details = get_place_details(place["place_id"])
-                time.sleep(0.2)  # Rate limiting
-                
-                normalized_address = normalize_address(details.get("formatted_address", ""))
-                record = {
-                    "name": details.get("name", ""),
-                    "address": normalized_address,
-                    "phone": details.get("international_phone_number", ""),
-                    "website": details.get("website", ""),
-                    "price_level": details.get("price_level", ""),
-                    "rating": details.get("rating", ""),
-                    "user_ratings_total": details.get("user_ratings_total", ""),
-                }
-                records.append(record)
-                print(f"   → {details.get('name', 'Unknown')}")
-                
-            except Exception as e:
-                print(f"   ✗ Error processing place: {e}")
-                continue
+        def fetch_details(place_id: str) -> dict:
+            if store is not None and reuse_max_age > 0:
+                details = store.get_details(place_id, max_age=reuse_max_age)
+                if details is not None:
+                    return details
+            cache = get_details_cache()
+            key = details_cache_key(place_id, DETAILS_FIELDS)
+            loaded = []
 
-        print(f"🔎 Found {len(records)} places.")
-        
-        # Create filename based on keywords
-        safe_keywords = "".join(c for c in keywords if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_keywords = safe_keywords.replace(' ', '_')
-        
-        # Enhanced Vercel/serverless environment detection
-        is_vercel = (
-            os.environ.get("VERCEL") == "1" or 
-            os.environ.get("VERCEL_ENV") is not None or 
-            "/var/task" in os.environ.get("PYTHONPATH", "") or
-            os.path.exists("/tmp") and not os.path.exists("C:\\")
-        )
-        
-        if is_vercel:
-            base_dir = "/tmp"
-            print(f"🔧 Using Vercel serverless directory: {base_dir}")
-        else:
-            base_dir = "exports"
-            print(f"🔧 Using local directory: {base_dir}")
-            
-        # Ensure directory exists
-        os.makedirs(base_dir, exist_ok=True)
-        filename = f"{base_dir}/{safe_keywords}.csv"
-        
-        # Save to CSV
-        save_csv(records, filename)
+            def load():
+                details = fetch_place_details(place_id, DETAILS_FIELDS)
+                loaded.append(time.time())
+                return details
+
+            details = cache.get_or_load(key, load, cacheable=bool)
+            if not loaded:
+                entry = cache.get_entry(key)
+                loaded.append(entry[1] if entry is not None else time.time())
+            with fetched_lock:
+                fetched_at[place_id] = loaded[0]
+            return details
+
+        pages = search_pages(keywords, location, bounds=bounds, polygon=polygon,
+                             tile_radius=tile_radius, max_workers=max_workers,
+                             progress=progress)
+        filename = export_filename(keywords, export_format)
+
+        with ExportWriter(filename, LEAD_FIELDS, fmt=export_format) as writer:
+            for place, details, error in iter_place_details(
+                    pages, max_workers, requests_per_second, pipelined, fetch=fetch_details):
+                if error is not None:
+                    logger.warning("✗ Error processing place: %s", error)
+                    continue
+                record = build_record(details)
+                writer.write(record)
+                if store is not None and details:
+                    place_id = place["place_id"]
+                    with fetched_lock:
+                        fetched = fetched_at.get(place_id)
+                    if fetched is None:
+                        store.mark_seen(place_id, keywords, location, rank=writer.rows_written)
+                    else:
+                        store.upsert_lead(place_id, details, record, keyword=keywords,
+                                          district=location, rank=writer.rows_written,
+                                          fetched_at=fetched)
+                if on_record is not None:
+                    on_record(record)
+                logger.debug("→ %s", details.get('name', 'Unknown'))
+
+        logger.info("🔎 Found %d places.", writer.rows_written,
+                    extra={'keywords': keywords, 'location': location,
+                           'records': writer.rows_written})
         
         return {
-            "records_count": len(records),
+            "records_count": writer.rows_written,
             "filename": filename,
             "success": True
         }
         
     except Exception as e:
-        print(f"❌ Error during extraction: {e}")
+        logger.error("❌ Error during extraction: %s", e)
         raise e
 
+def refresh_leads(keywords: str, location: str, max_age: float = LEAD_REFRESH_MAX_AGE,
+                  bounds: dict = None, polygon: list = None, tile_radius: int = 500,
+                  max_workers: int = DETAILS_MAX_WORKERS,
+                  requests_per_second: float = 0,
+                  progress=None, on_record=None, export_format: str = None) -> dict:
+    """
+    Refresh a saved search (keywords + location) from the lead store.
+    The search itself is re-run, but details are fetched again only for
+    places that are new or whose stored details are older than `max_age`
+    seconds. Returns the added, changed and disappeared businesses.
+    `on_record` receives each record as soon as it is built.
+    """
+    store = get_lead_store()
+    if store is None:
+        raise ValueError("Refreshing leads requires the lead store (LEAD_STORE_ENABLED)")
+
+    previous = store.search_leads(keywords, location)
+    logger.info("♻️  Refreshing '%s' in %s: %d stored leads", keywords, location, len(previous))
+    refetched = set()
+    refetched_lock = threading.Lock()
+
+    def fetch_details(place_id: str) -> dict:
+        stored = previous.get(place_id)
+        if stored is not None and time.time() - stored["fetched_at"] <= max_age:
+            return stored["details"]
+        details = fetch_place_details(place_id, DETAILS_FIELDS)
+        if details:
+            get_details_cache().set(details_cache_key(place_id, DETAILS_FIELDS), details)
+        with refetched_lock:
+            refetched.add(place_id)
+        return details
+
+    pages = search_pages(keywords, location, bounds=bounds, polygon=polygon,
+                         tile_radius=tile_radius, max_workers=max_workers, progress=progress)
+    filename = export_filename(keywords, export_format)
+    added, changed = [], []
+    seen = set()
+    with ExportWriter(filename, LEAD_FIELDS, fmt=export_format) as writer:
+        for place, details, error in iter_place_details(
+                pages, max_workers, requests_per_second, fetch=fetch_details):
+            place_id = place["place_id"]
+            seen.add(place_id)
+            if error is not None:
+                logger.warning("✗ Error processing place: %s", error)
+                continue
+            record = build_record(details)
+            writer.write(record)
+            rank = writer.rows_written
+
+            if place_id in refetched:
+                if details:
+                    store.upsert_lead(place_id, details, record,
+                                      keyword=keywords, district=location, rank=rank)
+                if place_id not in previous:
+                    added.append(dict(record, place_id=place_id))
+                else:
+                    before = build_record(previous[place_id]["details"])
+                    fields = [k for k in record if record[k] != before.get(k)]
+                    if fields:
+                        changed.append({"place_id": place_id, "fields": fields,
+                                        "before": before, "after": record})
+            else:
+                store.mark_seen(place_id, keywords, location, rank=rank)
+            if on_record is not None:
+                on_record(record)
+
+    disappeared = [
+        dict(build_record(stored["details"]), place_id=place_id)
+        for place_id, stored in previous.items() if place_id not in seen
+    ]
+    store.forget_search_results(keywords, location, [p["place_id"] for p in disappeared])
+
+    logger.info("♻️  %d added, %d changed, %d disappeared, %d details fetched",
+                len(added), len(changed), len(disappeared), len(refetched),
+                extra={'keywords': keywords, 'location': location, 'added': len(added),
+                       'changed': len(changed), 'disappeared': len(disappeared),
+                       'details_fetched': len(refetched)})
+
+    return {
+        "success": True,
+        "filename": filename,
+        "records_count": writer.rows_written,
+        "details_fetched": len(refetched),
+        "added": added,
+        "changed": changed,
+        "disappeared": disappeared,
+        "unchanged_count": writer.rows_written - len(added) - len(changed),
+    }
+
 def main():
     """Main function for standalone usage."""
     keyword = input("Enter keyword: ").strip()
@@ -197,6 +543,6 @@ def main():
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    if API_KEY in ("", "PASTE_YOUR_KEY_HERE", "(hidden)"):
+    if API_KEY in (None, "", "PASTE_YOUR_KEY_HERE", "(hidden)"):
         raise SystemExit("‼ Please set your GOOGLE_API_KEY.")
     main()
\ No newline at end of file
@@ -0,0 +1,261 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from cache import normalize_key
+from logging_config import get_logger
+from paths import get_exports_dir
+
+logger = get_logger(__name__)
+
+LEAD_STORE_PATH = os.environ.get('LEAD_STORE_PATH')
+# Set LEAD_STORE_ENABLED=0 to stop recording extractions locally
+LEAD_STORE_ENABLED = os.environ.get('LEAD_STORE_ENABLED', '1') != '0'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    place_id TEXT PRIMARY KEY,
+    name TEXT,
+    address TEXT,
+    phone TEXT,
+    website TEXT,
+    price_level REAL,
+    rating REAL,
+    user_ratings_total INTEGER,
+    lat REAL,
+    lng REAL,
+    details TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_fetched_at ON leads (fetched_at);
+
+CREATE TABLE IF NOT EXISTS lead_searches (
+    place_id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    district TEXT NOT NULL,
+    rank INTEGER,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (place_id, keyword, district)
+);
+CREATE INDEX IF NOT EXISTS idx_lead_searches_keyword ON lead_searches (keyword, district);
+CREATE INDEX IF NOT EXISTS idx_lead_searches_district ON lead_searches (district);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    linkedin_url TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    company_key TEXT NOT NULL,
+    name TEXT,
+    role_title TEXT,
+    location TEXT,
+    connection_level TEXT,
+    experience TEXT,
+    full_title TEXT,
+    snippet TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_profiles_company ON profiles (company_key);
+CREATE INDEX IF NOT EXISTS idx_profiles_fetched_at ON profiles (fetched_at);
+"""
+
+LEAD_COLUMNS = ("place_id", "name", "address", "phone", "website", "price_level",
+                "rating", "user_ratings_total", "lat", "lng", "fetched_at")
+PROFILE_COLUMNS = ("linkedin_url", "company", "name", "role_title", "location",
+                   "connection_level", "experience", "full_title", "snippet", "fetched_at")
+
+MARK_SEEN_SQL = (
+    "INSERT INTO lead_searches (place_id, keyword, district, rank, seen_at) "
+    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(place_id, keyword, district) "
+    "DO UPDATE SET rank = excluded.rank, seen_at = excluded.seen_at"
+)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def normalize_linkedin_url(url: str) -> str:
+    """Canonical form of a profile URL: country subdomain, query and trailing slash dropped."""
+    parsed = urlparse(url.strip())
+    path = parsed.path.rstrip("/").lower()
+    return f"https://www.linkedin.com{path}"
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+
+class LeadStore:
+    """Durable local store of extracted leads (by place_id) and profiles (by LinkedIn URL)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    # Leads
+
+    def upsert_lead(self, place_id: str, details: dict, record: dict,
+                    keyword: str = None, district: str = None, rank: int = None,
+                    fetched_at: float = None):
+        """
+        Insert or update a lead and, if given, record the search that found it.
+        `fetched_at` is when `details` came from the API (default now); older
+        details never replace newer stored ones.
+        """
+        now = time.time()
+        if fetched_at is None:
+            fetched_at = now
+        location = (details.get("geometry") or {}).get("location") or {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO leads (place_id, name, address, phone, website, price_level, rating, "
+                "user_ratings_total, lat, lng, details, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(place_id) DO UPDATE SET name = excluded.name, "
+                "address = excluded.address, phone = excluded.phone, website = excluded.website, "
+                "price_level = excluded.price_level, rating = excluded.rating, "
+                "user_ratings_total = excluded.user_ratings_total, lat = excluded.lat, "
+                "lng = excluded.lng, details = excluded.details, fetched_at = excluded.fetched_at "
+                "WHERE excluded.fetched_at >= leads.fetched_at",
+                (place_id, record.get("name"), record.get("address"), record.get("phone"),
+                 record.get("website"), _number(record.get("price_level")),
+                 _number(record.get("rating")), _number(record.get("user_ratings_total")),
+                 location.get("lat"), location.get("lng"), json.dumps(details), fetched_at),
+            )
+            if keyword is not None and district is not None:
+                self._conn.execute(
+                    MARK_SEEN_SQL,
+                    (place_id, normalize_key(keyword), normalize_key(district), rank, now),
+                )
+
+    def get_details(self, place_id: str, max_age: float = None):
+        """Stored raw Places Details for `place_id`, or None if missing or older than `max_age`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT details, fetched_at FROM leads WHERE place_id = ?", (place_id,)
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row["fetched_at"] > max_age):
+            return None
+        return json.loads(row["details"])
+
+    def search_leads(self, keyword: str, district: str) -> dict:
+        """Leads last seen for a saved search: {place_id: {"details", "fetched_at"}}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT l.place_id, l.details, l.fetched_at FROM leads l "
+                "JOIN lead_searches s ON s.place_id = l.place_id "
+                "WHERE s.keyword = ? AND s.district = ?",
+                (normalize_key(keyword), normalize_key(district)),
+            ).fetchall()
+        return {
+            row["place_id"]: {"details": json.loads(row["details"]), "fetched_at": row["fetched_at"]}
+            for row in rows
+        }
+
+    def mark_seen(self, place_id: str, keyword: str, district: str, rank: int = None):
+        """Record that a search found `place_id` again, without touching its details."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                MARK_SEEN_SQL,
+                (place_id, normalize_key(keyword), normalize_key(district), rank, time.time()),
+            )
+
+    def forget_search_results(self, keyword: str, district: str, place_ids: list[str]):
+        """Unlink places a saved search no longer returns (the leads themselves are kept)."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM lead_searches WHERE place_id = ? AND keyword = ? AND district = ?",
+                [(p, normalize_key(keyword), normalize_key(district)) for p in place_ids],
+            )
+
+    def query_leads(self, keyword: str = None, district: str = None, since: float = None,
+                    limit: int = 50, offset: int = 0) -> list[dict]:
+        """Page through stored leads, newest first, optionally filtered by search and age."""
+        columns = ", ".join(f"l.{c}" for c in LEAD_COLUMNS)
+        sql = f"SELECT DISTINCT {columns} FROM leads l"
+        where, args = [], []
+        if keyword is not None or district is not None:
+            sql += " JOIN lead_searches s ON s.place_id = l.place_id"
+            if keyword is not None:
+                where.append("s.keyword = ?")
+                args.append(normalize_key(keyword))
+            if district is not None:
+                where.append("s.district = ?")
+                args.append(normalize_key(district))
+        if since is not None:
+            where.append("l.fetched_at >= ?")
+            args.append(since)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY l.fetched_at DESC LIMIT ? OFFSET ?"
+        args += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [dict(row) for row in rows]
+
+    # Profiles
+
+    def upsert_profiles(self, profiles: list[dict], company: str):
+        now = time.time()
+        rows = [
+            (normalize_linkedin_url(p["linkedin_url"]), company, normalize_key(company),
+             p.get("name"), p.get("role_title"), p.get("location"), p.get("connection_level"),
+             p.get("experience"), p.get("full_title"), p.get("snippet"), now)
+            for p in profiles if p.get("linkedin_url")
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO profiles (linkedin_url, company, company_key, name, role_title, "
+                "location, connection_level, experience, full_title, snippet, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(linkedin_url) DO UPDATE SET company = excluded.company, "
+                "company_key = excluded.company_key, name = excluded.name, "
+                "role_title = excluded.role_title, location = excluded.location, "
+                "connection_level = excluded.connection_level, experience = excluded.experience, "
+                "full_title = excluded.full_title, snippet = excluded.snippet, "
+                "fetched_at = excluded.fetched_at",
+                rows,
+            )
+
+    def query_profiles(self, company: str = None, since: float = None,
+                       limit: int = 50, offset: int = 0) -> list[dict]:
+        sql = f"SELECT {', '.join(PROFILE_COLUMNS)} FROM profiles"
+        where, args = [], []
+        if company is not None:
+            where.append("company_key = ?")
+            args.append(normalize_key(company))
+        if since is not None:
+            where.append("fetched_at >= ?")
+            args.append(since)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY fetched_at DESC LIMIT ? OFFSET ?"
+        args += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [dict(row) for row in rows]
+
+
+def get_lead_store():
+    """Shared LeadStore, created on first use; None when LEAD_STORE_ENABLED=0 or unavailable."""
+    global _store
+    if not LEAD_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            path = LEAD_STORE_PATH or os.path.join(get_exports_dir(), "leads.sqlite3")
+            try:
+                _store = LeadStore(path)
+            except sqlite3.Error as e:
+                logger.warning("⚠️  Lead store unavailable (%s)", e)
+                return None
+        return _store
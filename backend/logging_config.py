@@ -0,0 +1,88 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# "text" for humans, "json" for one JSON object per line (log pipeline)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in RESERVED_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: records are dropped when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """
+    Route all logging through a bounded queue to a background thread that
+    writes to stdout. Safe to call more than once; later calls only change
+    the level and format.
+    """
+    global _listener, _handler
+    level = (level or LOG_LEVEL).upper()
+    fmt = (fmt or LOG_FORMAT).lower()
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    with _configure_lock:
+        root = logging.getLogger()
+        root.setLevel(level)
+        if _listener is None:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            _handler = DroppingQueueHandler(log_queue)
+            _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+            root.addHandler(_handler)
+        for handler in _listener.handlers:
+            handler.setFormatter(formatter)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Named logger; sets up the default queue-based output on first use."""
+    if _listener is None:
+        configure_logging()
+    return logging.getLogger(name)
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,239 @@
+import sys
+import threading
+import time
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Finer buckets for in-process stages (matching, export writes)
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+PREFIX = "hkgrow"
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets (seconds)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.total
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets, counts):
+            running += n
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+
+class Gauge:
+    """Thread-safe up/down counter per label value (e.g. requests in flight)."""
+
+    def __init__(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def add(self, label: str, amount: int = 1):
+        with self._lock:
+            self.values[label] = self.values.get(label, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.values)
+
+
+_stages = {}
+_request_durations = {}
+_registry_lock = threading.Lock()
+requests_in_flight = Gauge()
+
+
+def _histogram(registry: dict, label: str, buckets) -> LatencyHistogram:
+    histogram = registry.get(label)
+    if histogram is None:
+        with _registry_lock:
+            histogram = registry.setdefault(label, LatencyHistogram(buckets))
+    return histogram
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record the time one in-process stage (e.g. "matching") took."""
+    _histogram(_stages, stage, STAGE_BUCKETS).observe(seconds)
+
+
+def stage_totals() -> dict:
+    """{stage: (count, total seconds)} for every stage observed so far."""
+    with _registry_lock:
+        stages = dict(_stages)
+    totals = {}
+    for stage, histogram in stages.items():
+        snapshot = histogram.snapshot()
+        totals[stage] = (snapshot["count"], snapshot["sum"])
+    return totals
+
+
+class stage_timer:
+    """Context manager timing a block as `stage`."""
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def request_started(route: str):
+    requests_in_flight.add(route)
+
+
+def request_finished(route: str, seconds: float):
+    requests_in_flight.add(route, -1)
+    _histogram(_request_durations, route, LATENCY_BUCKETS).observe(seconds)
+
+
+# Prometheus text exposition
+
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Exposition:
+    """Builds a Prometheus text-format (0.0.4) page, one metric family at a time."""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def sample(self, name: str, value, **labels):
+        if value is None:
+            return
+        self.lines.append(f"{PREFIX}_{name}{_labels(**labels)} {_number(value)}")
+
+    def histogram(self, name: str, snapshot: dict, **labels):
+        for bound, count in snapshot["buckets"].items():
+            self.sample(f"{name}_bucket", count, **labels, le=bound)
+        self.sample(f"{name}_sum", snapshot["sum"], **labels)
+        self.sample(f"{name}_count", snapshot["count"], **labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics() -> str:
+    """
+    Current metrics in Prometheus text format. Modules that haven't been
+    imported yet (extractors, caches) are skipped rather than loaded.
+    """
+    out = Exposition()
+
+    http_client = sys.modules.get("http_client")
+    if http_client is not None:
+        stats = http_client.latency_stats()
+        out.family("api_call_duration_seconds", "histogram",
+                   "Google API call latency by endpoint (geocode, nearbysearch, details, customsearch)")
+        for endpoint, snapshot in sorted(stats.items()):
+            out.histogram("api_call_duration_seconds", snapshot, endpoint=endpoint)
+        out.family("api_calls_total", "counter", "Google API calls by endpoint and status")
+        for endpoint, snapshot in sorted(stats.items()):
+            for status, count in sorted(snapshot["status"].items()):
+                out.sample("api_calls_total", count, endpoint=endpoint, status=status)
+        out.family("api_calls_in_flight", "gauge", "Google API calls currently waiting for a response")
+        for endpoint, value in sorted(http_client.calls_in_flight.snapshot().items()):
+            out.sample("api_calls_in_flight", value, endpoint=endpoint)
+
+    with _registry_lock:
+        stages = dict(_stages)
+        durations = dict(_request_durations)
+    out.family("stage_duration_seconds", "histogram",
+               "Time spent in in-process stages (matching, export_write)")
+    for stage, histogram in sorted(stages.items()):
+        out.histogram("stage_duration_seconds", histogram.snapshot(), stage=stage)
+    out.family("http_request_duration_seconds", "histogram", "Backend request latency by route")
+    for route, histogram in sorted(durations.items()):
+        out.histogram("http_request_duration_seconds", histogram.snapshot(), route=route)
+    out.family("http_requests_in_flight", "gauge", "Backend requests currently being handled")
+    for route, value in sorted(requests_in_flight.snapshot().items()):
+        out.sample("http_requests_in_flight", value, route=route)
+
+    rate_limit = sys.modules.get("rate_limit")
+    if rate_limit is not None:
+        out.family("api_rate_limit", "gauge", "Requests per second currently allowed by endpoint (after AIMD)")
+        for endpoint, rate in sorted(rate_limit.limiter_rates().items()):
+            out.sample("api_rate_limit", rate, endpoint=endpoint)
+
+    cache = sys.modules.get("cache")
+    if cache is not None:
+        caches = cache.cache_stats()
+        out.family("cache_hits_total", "counter", "Cache lookups answered from the cache")
+        for stats in caches:
+            out.sample("cache_hits_total", stats["hits"], cache=stats["name"])
+        out.family("cache_misses_total", "counter", "Cache lookups that missed")
+        for stats in caches:
+            out.sample("cache_misses_total", stats["misses"], cache=stats["name"])
+        out.family("cache_hit_ratio", "gauge", "Hits / lookups since start")
+        for stats in caches:
+            out.sample("cache_hit_ratio", stats["hit_ratio"], cache=stats["name"])
+        out.family("cache_entries", "gauge", "Entries held in memory")
+        for stats in caches:
+            out.sample("cache_entries", stats["size"], cache=stats["name"])
+
+    people_extractor = sys.modules.get("people_extractor")
+    if people_extractor is not None:
+        search = people_extractor.search_cache_stats()
+        out.family("custom_search_paid_calls_total", "counter", "Custom Search queries billed against the quota")
+        out.sample("custom_search_paid_calls_total", search["paid_calls"])
+        out.family("custom_search_calls_saved_total", "counter", "Custom Search queries answered from cache")
+        out.sample("custom_search_calls_saved_total", search["paid_calls_saved"])
+        out.family("custom_search_quota_remaining", "gauge", "Custom Search queries left in today's budget")
+        out.sample("custom_search_quota_remaining", search["quota_remaining"])
+        out.family("custom_search_cache_only", "gauge", "1 while searches are served from cache only")
+        out.sample("custom_search_cache_only", int(search["cache_only"]))
+
+    coalesce = sys.modules.get("coalesce")
+    if coalesce is not None:
+        stats = coalesce.get_single_flight().stats()
+        out.family("coalesced_requests_total", "counter", "Extraction requests that reused another run")
+        out.sample("coalesced_requests_total", stats["shared"], source="in_flight")
+        out.sample("coalesced_requests_total", stats["memo_hits"], source="memo")
+
+    logging_config = sys.modules.get("logging_config")
+    if logging_config is not None:
+        out.family("log_records_dropped_total", "counter", "Log records dropped because the queue was full")
+        out.sample("log_records_dropped_total", logging_config.dropped_records())
+
+    return out.render()
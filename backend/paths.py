@@ -0,0 +1,15 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_exports_dir() -> str:
+    """Return the directory exports are written to (/tmp on serverless). Detected once per process."""
+    # Enhanced Vercel/serverless environment detection
+    is_vercel = (
+        os.environ.get("VERCEL") == "1" or 
+        os.environ.get("VERCEL_ENV") is not None or 
+        "/var/task" in os.environ.get("PYTHONPATH", "") or
+        os.path.exists("/tmp") and not os.path.exists("C:\\")
+    )
+    return "/tmp" if is_vercel else "exports"
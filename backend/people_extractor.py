@@ -1,123 +1,167 @@
 import requests
-from difflib import SequenceMatcher
-import csv
+import http_client
+from cassette import replaying
 import json
-    # Check word-by-word similarity (only for words >= 4 characters to avoid false positives)
-    for variation in company_variations:
-        company_words = variation.split()
-        title_words = title_lower.split()
-        
-        for company_word in company_words:
-            if len(company_word) < 4:  # Increased from 3 to 4 for better accuracy
-                continue
-            for title_word in title_words:
-                similarity = calculate_similarity(company_word, title_word)
-                if similarity >= threshold:
-                    print(f"Word match: '{company_word}' ~ '{title_word}' (similarity: {similarity:.2f})")
-                    return True, similarity import datetime
+from datetime import datetime
+from cache import TieredCache, is_expired
+from export_writer import PROFILE_FIELDS, ExportWriter, export_extension
+from lead_store import get_lead_store, normalize_linkedin_url
+from paths import get_exports_dir
+from company_matcher import get_matcher, normalize_company_name
+from rate_limit import QuotaBudget, QuotaExceededError
+from concurrent.futures import ThreadPoolExecutor
 import os
-import tempfile
+import threading
+from logging_config import get_logger
+from metrics import stage_timer
+
+logger = get_logger(__name__)
 
-# Use environment variables for API keys
+# Use environment variables for API keys (checked on first use, see get_search_credentials)
 GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
 GOOGLE_CSE_ID = os.environ.get('GOOGLE_CSE_ID')
 
-# Validate that required environment variables are set
-if not GOOGLE_API_KEY or not GOOGLE_CSE_ID:
-    raise ValueError("Missing required environment variables: GOOGLE_API_KEY and/or GOOGLE_CSE_ID")
+# Custom Search daily budget, shared by every process using the rate-limit store
+# (the per-second limit, CUSTOM_SEARCH_QPS, is applied in http_client)
+CUSTOM_SEARCH_DAILY_QUOTA = int(os.environ.get('CUSTOM_SEARCH_DAILY_QUOTA', '10000'))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '4'))
+
+# Custom Search returns at most 10 results per call and 100 per query
+SEARCH_PAGE_SIZE = 10
+# 429 error reasons meaning the day's quota is gone (anything else is the per-minute limit)
+DAILY_QUOTA_REASONS = {"dailyLimitExceeded", "quotaExceeded"}
+SEARCH_MAX_START = 91
+
+# Custom Search responses cached by query; each hit saves a paid call
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', '1024'))
+SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', str(7 * 24 * 3600)))
+SEARCH_CACHE_PATH = os.environ.get('SEARCH_CACHE_PATH')
+
+search_budget = QuotaBudget("Custom Search", CUSTOM_SEARCH_DAILY_QUOTA)
+
+_search_cache = None
+_search_lock = threading.Lock()
+search_counters = {'paid_calls': 0, 'paid_calls_saved': 0, 'cache_only_misses': 0}
+
+def get_search_cache() -> TieredCache:
+    """Create the search result cache on first use. Set SEARCH_CACHE_PATH="" for memory only."""
+    global _search_cache
+    with _search_lock:
+        if _search_cache is None:
+            path = SEARCH_CACHE_PATH
+            if path is None:
+                path = os.path.join(get_exports_dir(), "search_cache.sqlite3")
+            _search_cache = TieredCache("custom_search", maxsize=SEARCH_CACHE_SIZE,
+                                        ttl=SEARCH_CACHE_TTL, path=path,
+                                        max_disk_entries=SEARCH_CACHE_SIZE * 10)
+        return _search_cache
+
+def get_search_credentials():
+    """(api_key, cse_id), validated when a search is first made rather than at import."""
+    api_key = GOOGLE_API_KEY or os.environ.get('GOOGLE_API_KEY')
+    cse_id = GOOGLE_CSE_ID or os.environ.get('GOOGLE_CSE_ID')
+    if replaying():
+        # Keys aren't sent (or matched) when answering from a cassette
+        return api_key or "replay", cse_id or "replay"
+    if not api_key or not cse_id:
+        raise ValueError("Missing required environment variables: GOOGLE_API_KEY and/or GOOGLE_CSE_ID")
+    return api_key, cse_id
+
+def count_search(counter):
+    with _search_lock:
+        search_counters[counter] += 1
+
+def search_cache_key(query, cse_id, start, num):
+    return f"{cse_id}|{start}|{num}|{' '.join(query.split())}"
+
+def quota_exhausted():
+    return search_budget.remaining() == 0
+
+def search_cache_stats():
+    """Search cache hit/miss stats, paid calls made and saved, and today's quota state."""
+    with _search_lock:
+        counters = dict(search_counters)
+    stats = get_search_cache().stats()
+    stats.update(counters)
+    stats['quota_remaining'] = search_budget.remaining()
+    stats['cache_only'] = quota_exhausted()
+    return stats
 
-def google_search(query, api_key, cse_id, max_results=10):
-    """Perform Google Custom Search API call"""
+def cache_only_result(entry, query, reason="Custom Search quota exhausted"):
+    """Serve an expired cached response (or nothing) when a paid call can't be made."""
+    if entry is not None:
+        count_search('paid_calls_saved')
+        logger.warning("⚠️  %s, serving expired cached results for: %s", reason, query)
+        return entry[0]
+    count_search('cache_only_misses')
+    logger.warning("⚠️  %s and no cached results for: %s", reason, query)
+    return []
+
+def daily_quota_exceeded(resp) -> bool:
+    """True if a 429 response is Google's daily quota rather than its per-minute rate limit."""
+    try:
+        errors = resp.json()["error"]["errors"]
+    except (ValueError, KeyError, TypeError):
+        return False
+    if not isinstance(errors, list):
+        return False
+    return any(isinstance(e, dict) and e.get("reason") in DAILY_QUOTA_REASONS for e in errors)
+
+def google_search(query, api_key, cse_id, max_results=10, start=1):
+    """
+    Perform Google Custom Search API call.
+    `start` is the 1-based index of the first result (pages of up to 10).
+    Responses are cached for SEARCH_CACHE_TTL seconds. Paid calls are
+    spaced to CUSTOM_SEARCH_QPS and counted against the daily budget; once
+    it is used up (or Google reports its daily quota exceeded) only cached
+    results are served. A rate-limit 429 only falls back to the cache for
+    that call, while the shared limiter slows down.
+    """
+    num = min(max_results, SEARCH_PAGE_SIZE)
+    cache = get_search_cache()
+    key = search_cache_key(query, cse_id, start, num)
+    entry = cache.get_entry(key)
+    if entry is not None and not is_expired(entry[1], cache.ttl):
+        cache.record_hit()
+        count_search('paid_calls_saved')
+        return entry[0]
+    cache.record_miss()
+    
+    try:
+        search_budget.consume()
+    except QuotaExceededError:
+        return cache_only_result(entry, query)
     url = "https://www.googleapis.com/customsearch/v1"
     params = {
         "key": api_key,
         "cx": cse_id,
         "q": query,
-        "num": min(max_results, 10)
+        "num": num,
+        "start": start
     }
     try:
-        resp = requests.get(url, params=params)
+        resp = http_client.get("customsearch", url, params=params, timeout=10)
+        count_search('paid_calls')
+        if resp.status_code == 429:
+            if daily_quota_exceeded(resp):
+                search_budget.exhaust()
+                return cache_only_result(entry, query)
+            return cache_only_result(entry, query, reason="Custom Search rate limited")
         resp.raise_for_status()
         data = resp.json()
         items = data.get("items", [])
+        cache.set(key, items)
         return items
     except requests.exceptions.HTTPError as e:
-        print(f"HTTP Error during search: {e}")
+        logger.error("HTTP Error during search: %s", e)
         return []
     except Exception as e:
-        print(f"Error during search: {e}")
+        logger.error("Error during search: %s", e)
         return []
 
-def calculate_similarity(text1, text2):
-    """Calculate similarity between two strings (0.0 to 1.0)"""
-    return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
-
 def company_name_matches(company_name, title, threshold=0.6):
     """Enhanced company name matching with multiple variations"""
-    company_lower = company_name.lower()
-    title_lower = title.lower()
-    
-    # Create variations of company name to check
-    company_variations = [
-        company_name.lower(),
-        normalize_company_name(company_name).lower()
-    ]
-    
-    # Add version without common suffixes
-    base_name = normalize_company_name(company_name)
-    if base_name != company_name:
-        company_variations.append(base_name.lower())
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    company_variations = [x for x in company_variations if not (x in seen or seen.add(x))]
-    
-    print(f"Checking company variations: {company_variations}")
-    
-    # Check exact matches first (with word boundaries)
-    import re
-    for variation in company_variations:
-        # Use word boundary matching to avoid partial matches
-        pattern = r'\b' + re.escape(variation) + r'\b'
-        if re.search(pattern, title_lower):
-            print(f"Exact word match found for '{variation}'")
-            return True, 1.0
-    
-    # Check for "at Company" or "@ Company" patterns (strong indicator)
-    for variation in company_variations:
-        if f' at {variation}' in title_lower or f'@ {variation}' in title_lower or f'at {variation}' in title_lower:
-            print(f"Strong context match: 'at {variation}'")
-            return True, 1.0
-    
-    # Check word-by-word similarity (only for words >= 4 characters to avoid false positives)
-    for variation in company_variations:
-        company_words = variation.split()
-        title_words = title_lower.split()
-        
-        for company_word in company_words:
-            if len(company_word) < 4:  # Increased from 3 to 4 for better accuracy
-                continue
-            for title_word in title_words:
-                similarity = calculate_similarity(company_word, title_word)
-                if similarity >= threshold:
-                    print(f"Word match: '{company_word}' ~ '{title_word}' (similarity: {similarity:.2f})")
-                    return True, similarity
-    
-    # Check substring similarity
-    max_similarity = 0
-    best_match = ""
-    for variation in company_variations:
-        for i in range(len(title_lower) - len(variation) + 1):
-            title_segment = title_lower[i:i+len(variation)]
-            similarity = calculate_similarity(variation, title_segment)
-            if similarity > max_similarity:
-                max_similarity = similarity
-                best_match = title_segment
-    
-    if max_similarity >= threshold:
-        print(f"Substring match: '{best_match}' (similarity: {max_similarity:.2f})")
-    
-    return max_similarity >= threshold, max_similarity
+    return get_matcher(company_name, threshold).match(title)
 
 def extract_name_from_title(title):
     """Extract person's name from LinkedIn title"""
@@ -152,222 +196,255 @@ def extract_experience_from_snippet(snippet, title):
     else:
         return "3+ years"
 
-def save_to_csv(people, company_name):
-    """Save results to CSV file in appropriate directory"""
+def profile_row(person, company_name):
+    """Export row for one profile (PROFILE_FIELDS)."""
+    return {
+        'Company': person.get('company', company_name),
+        'Name': person['name'],
+        'Title': person['role_title'],
+        'LinkedIn_URL': person['linkedin_url'],
+        'Location': person.get('location', 'Unknown'),
+        'Connection_Level': person.get('connection_level', '2nd'),
+        'Experience': person.get('experience', '5+ years')
+    }
+
+def open_profile_export(company_name, export_format=None):
+    """ExportWriter for a company's profiles, in the same exports directory as lead exports."""
+    exports_dir = get_exports_dir()
+    
+    # Generate filename with timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = (f"{company_name.replace(' ', '_').lower()}_linkedin_profiles_{timestamp}"
+                f"{export_extension(export_format)}")
+    return ExportWriter(os.path.join(exports_dir, filename), PROFILE_FIELDS, fmt=export_format)
+
+def save_to_csv(people, company_name, export_format=None):
+    """Save a complete list of profiles; returns the file path, or None on failure."""
     try:
-        # Determine if running on Vercel (serverless) or locally
-        is_vercel = os.environ.get('VERCEL') == '1' or os.environ.get('NOW_REGION')
-        
-        if is_vercel:
-            # Use /tmp directory for Vercel serverless functions
-            base_dir = '/tmp'
-        else:
-            # Use current directory for local development
-            base_dir = os.getcwd()
-            
-        # Create exports directory if it doesn't exist
-        exports_dir = os.path.join(base_dir, 'exports')
-        os.makedirs(exports_dir, exist_ok=True)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{company_name.replace(' ', '_').lower()}_linkedin_profiles_{timestamp}.csv"
-        filepath = os.path.join(exports_dir, filename)
-        
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Company', 'Name', 'Title', 'LinkedIn_URL', 'Location', 'Connection_Level', 'Experience']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
+        with open_profile_export(company_name, export_format) as writer:
             for person in people:
-                writer.writerow({
-                    'Company': company_name,
-                    'Name': person['name'],
-                    'Title': person['role_title'],
-                    'LinkedIn_URL': person['linkedin_url'],
-                    'Location': person.get('location', 'Unknown'),
-                    'Connection_Level': person.get('connection_level', '2nd'),
-                    'Experience': person.get('experience', '5+ years')
-                })
-        
-        return filepath
+                writer.write(profile_row(person, company_name))
+        return writer.path
         
     except Exception as e:
-        print(f"Error saving CSV: {e}")
+        logger.error("Error saving CSV: %s", e)
         return None
 
-def normalize_company_name(company_name):
-    """Normalize company name for search queries"""
-    # Remove common location suffixes that might interfere with search
-    name = company_name.strip()
+def evaluate_search_result(item, company_name):
+    """Validate one Custom Search result; returns the profile dict (without id) or None."""
+    link = item.get("link", "")
+    title = item.get("title", "")
+    snippet = item.get("snippet", "")
+    
+    logger.debug("Found result: %.80s...", title)
+    logger.debug("Snippet: %.100s...", snippet)
+    
+    # Only accept individual LinkedIn profiles
+    is_individual_profile = (
+        'linkedin.com/in/' in link.lower() and 
+        '/pub/dir/' not in link.lower() and
+        '/company/' not in link.lower() and
+        '/posts/' not in link.lower()
+    )
+    
+    if not is_individual_profile:
+        logger.debug("✗ REJECTED: Not an individual profile")
+        return None
+    
+    # Extract name first to separate it from role
+    name = extract_name_from_title(title)
+    
+    # Extract role title (the part after " - " and before " | ")
+    role_and_company = ""
+    if " - " in title:
+        role_and_company = title.split(" - ", 1)[1].split(" | ")[0].strip()
+    
+    # SMART CHECK 1: Company name should appear in role/company section, NOT in person's name
+    company_in_name = False
+    company_in_role = False
+    
+    # Check if company appears in the person's name (we want to avoid this)
+    name_lower = name.lower()
+    normalized_company = normalize_company_name(company_name).lower()
+    
+    if normalized_company in name_lower:
+        company_in_name = True
+        logger.debug("⚠️  WARNING: Company name '%s' found in person's name '%s'", normalized_company, name)
     
-    # Remove HK/Hong Kong suffixes for search but keep for matching
-    search_name = name
-    location_suffixes = ['HK', 'Hong Kong', 'Ltd', 'Limited', 'Co.', 'Inc.', 'Corp.']
+    # Check if company appears in role/company section (this is what we want)
+    if role_and_company:
+        role_lower = role_and_company.lower()
+        if normalized_company in role_lower:
+            company_in_role = True
+            logger.debug("✓ Company '%s' found in role: %s", normalized_company, role_and_company)
     
-    for suffix in location_suffixes:
-        if search_name.endswith(f' {suffix}'):
-            search_name = search_name[:-len(f' {suffix}')].strip()
-        elif search_name.endswith(suffix):
-            search_name = search_name[:-len(suffix)].strip()
+    # SMART CHECK 2: Also check snippet for company context
+    snippet_lower = snippet.lower()
+    company_in_snippet = normalized_company in snippet_lower
     
-    return search_name
+    # SMART CHECK 3: Use enhanced matching on role/snippet, not full title
+    company_matches_role, similarity_score = company_name_matches(
+        company_name, 
+        role_and_company + " " + snippet,  # Check role and snippet together
+        threshold=0.6  # Higher threshold for accuracy
+    )
+    
+    # DECISION LOGIC: Accept only if company appears in role/snippet, not just in name
+    is_valid_match = (
+        (company_in_role or company_in_snippet or company_matches_role) and
+        not (company_in_name and not company_in_role)  # Reject if only in name
+    )
+    
+    logger.debug("Validation: InName=%s, InRole=%s, InSnippet=%s, Match=%s",
+                 company_in_name, company_in_role, company_in_snippet, company_matches_role)
+    logger.debug("Final Decision: %s (similarity: %.2f)",
+                 '✓ VALID' if is_valid_match else '✗ INVALID', similarity_score)
+    
+    if not is_valid_match:
+        logger.debug("✗ REJECTED: Does not meet filter criteria")
+        return None
+    
+    logger.debug("✓ ACCEPTED: %s - %s", name, role_and_company)
+    return {
+        'name': name,
+        'role_title': role_and_company,
+        'linkedin_url': link,
+        'full_title': title,
+        'snippet': snippet,
+        'location': extract_location_from_snippet(snippet),
+        'connection_level': determine_connection_level(),
+        'experience': extract_experience_from_snippet(snippet, title),
+        'company': company_name
+    }
 
-def scrape_company_people(company_name, location="Hong Kong", limit=10):
-    """Main function to scrape LinkedIn profiles for a company"""
-    all_results = []
+def fetch_search_pages(query, starts):
+    """Fetch result pages for the given start offsets concurrently, in order."""
+    api_key, cse_id = get_search_credentials()
+    if len(starts) == 1:
+        return [google_search(query, api_key, cse_id, start=starts[0])]
+    with ThreadPoolExecutor(max_workers=len(starts)) as executor:
+        return list(executor.map(
+            lambda start: google_search(query, api_key, cse_id, start=start),
+            starts,
+        ))
+
+def scrape_company_people(company_name, location="Hong Kong", limit=10, on_profile=None):
+    """
+    Main function to scrape LinkedIn profiles for a company.
+    `on_profile` is called with each unique profile as soon as it is accepted.
+
+    Results are paged 10 at a time via the `start` parameter. Each round
+    requests only as many pages as could still be needed to reach `limit`
+    (concurrently); paging stops once `limit` unique profiles are found, a
+    page comes back short, or a page adds no new accepted profile.
+    """
+    unique_results = []
+    seen_names = set()
+    seen_urls = set()
     
     # Use normalized company name for search queries
     search_company_name = normalize_company_name(company_name)
     
-    print(f"Original company name: {company_name}")
-    print(f"Normalized for search: {search_company_name}")
-    print(f"Location: {location}")
+    logger.debug("Original company name: %s", company_name)
+    logger.debug("Normalized for search: %s", search_company_name)
+    logger.debug("Location: %s", location)
     
     # Single comprehensive search query - simple and effective
     search_query = f'site:linkedin.com/in/ "{search_company_name}" {location}'
     
-    print(f"\nSearching: {search_query}")
-    search_results = google_search(search_query, GOOGLE_API_KEY, GOOGLE_CSE_ID, max_results=10)
-    
-    if not search_results:
-        print("No search results found.")
-        return []
+    logger.info("Searching: %s", search_query)
     
-    for item in search_results:
-            if len(all_results) >= limit:
-                break
-                
-            link = item.get("link", "")
-            title = item.get("title", "")
-            snippet = item.get("snippet", "")
-            
-            print(f"\nFound result: {title[:80]}...")
-            print(f"Snippet: {snippet[:100]}...")
-            
-            # Only accept individual LinkedIn profiles
-            is_individual_profile = (
-                'linkedin.com/in/' in link.lower() and 
-                '/pub/dir/' not in link.lower() and
-                '/company/' not in link.lower() and
-                '/posts/' not in link.lower()
-            )
-            
-            if not is_individual_profile:
-                print("✗ REJECTED: Not an individual profile")
-                continue
-            
-            # Extract name first to separate it from role
-            name = extract_name_from_title(title)
-            
-            # Extract role title (the part after " - " and before " | ")
-            role_and_company = ""
-            if " - " in title:
-                role_and_company = title.split(" - ", 1)[1].split(" | ")[0].strip()
-            
-            # SMART CHECK 1: Company name should appear in role/company section, NOT in person's name
-            company_in_name = False
-            company_in_role = False
-            
-            # Check if company appears in the person's name (we want to avoid this)
-            name_lower = name.lower()
-            normalized_company = normalize_company_name(company_name).lower()
-            
-            if normalized_company in name_lower:
-                company_in_name = True
-                print(f"⚠️  WARNING: Company name '{normalized_company}' found in person's name '{name}'")
-            
-            # Check if company appears in role/company section (this is what we want)
-            if role_and_company:
-                role_lower = role_and_company.lower()
-                if normalized_company in role_lower:
-                    company_in_role = True
-                    print(f"✓ Company '{normalized_company}' found in role: {role_and_company}")
-            
-            # SMART CHECK 2: Also check snippet for company context
-            snippet_lower = snippet.lower()
-            company_in_snippet = normalized_company in snippet_lower
-            
-            # SMART CHECK 3: Use enhanced matching on role/snippet, not full title
-            company_matches_role, similarity_score = company_name_matches(
-                company_name, 
-                role_and_company + " " + snippet,  # Check role and snippet together
-                threshold=0.6  # Higher threshold for accuracy
-            )
-            
-            # DECISION LOGIC: Accept only if company appears in role/snippet, not just in name
-            is_valid_match = (
-                (company_in_role or company_in_snippet or company_matches_role) and
-                not (company_in_name and not company_in_role)  # Reject if only in name
-            )
-            
-            print(f"Validation: InName={company_in_name}, InRole={company_in_role}, InSnippet={company_in_snippet}, Match={company_matches_role}")
-            print(f"Final Decision: {'✓ VALID' if is_valid_match else '✗ INVALID'} (similarity: {similarity_score:.2f})")
-            
-            if is_valid_match:
-                # Extract role title properly
-                role_title = role_and_company
-                
-                # Extract additional info
-                location = extract_location_from_snippet(snippet)
-                connection_level = determine_connection_level()
-                experience = extract_experience_from_snippet(snippet, title)
+    next_start = 1
+    pages_fetched = 0
+    exhausted = False
+    while not exhausted and len(unique_results) < limit and next_start <= SEARCH_MAX_START:
+        needed = limit - len(unique_results)
+        page_count = min(-(-needed // SEARCH_PAGE_SIZE),
+                         (SEARCH_MAX_START - next_start) // SEARCH_PAGE_SIZE + 1)
+        starts = [next_start + i * SEARCH_PAGE_SIZE for i in range(page_count)]
+        next_start = starts[-1] + SEARCH_PAGE_SIZE
+        pages = fetch_search_pages(search_query, starts)
+        pages_fetched += len(pages)
+        
+        if pages_fetched == len(pages) and not pages[0]:
+            logger.info("No search results found.")
+            return []
+        
+        for items in pages:
+            added = 0
+            for item in items:
+                if len(unique_results) >= limit:
+                    break
+                with stage_timer("matching"):
+                    profile_data = evaluate_search_result(item, company_name)
+                if profile_data is None:
+                    continue
                 
-                profile_data = {
-                    'id': str(len(all_results) + 1),
-                    'name': name,
-                    'role_title': role_title,
-                    'linkedin_url': link,
-                    'full_title': title,
-                    'snippet': snippet,
-                    'location': location,
-                    'connection_level': connection_level,
-                    'experience': experience,
-                    'company': company_name
-                }
+                # Skip people already found (by name or profile URL)
+                name_key = profile_data['name'].lower().strip()
+                url_key = normalize_linkedin_url(profile_data['linkedin_url'])
+                if not name_key or name_key in seen_names or url_key in seen_urls:
+                    logger.debug("↺ Duplicate: %s", profile_data['name'])
+                    continue
+                seen_names.add(name_key)
+                seen_urls.add(url_key)
                 
-                all_results.append(profile_data)
-                print(f"✓ ACCEPTED: {name} - {role_title}")
-            else:
-                print("✗ REJECTED: Does not meet filter criteria")
-    
-    # Remove duplicates based on name (case-insensitive)
-    unique_results = []
-    seen_names = set()
-    
-    for person in all_results:
-        name_lower = person['name'].lower().strip()
-        if name_lower not in seen_names and name_lower:
-            seen_names.add(name_lower)
-            unique_results.append(person)
-    
-    print(f"Total profiles found: {len(all_results)}")
-    print(f"Unique people after removing duplicates: {len(unique_results)}")
+                profile_data = {'id': str(len(unique_results) + 1), **profile_data}
+                unique_results.append(profile_data)
+                added += 1
+                if on_profile is not None:
+                    on_profile(profile_data)
+            
+            if len(unique_results) >= limit or len(items) < SEARCH_PAGE_SIZE or added == 0:
+                exhausted = True
+                break
     
-    # Limit results
-    limited_results = unique_results[:limit]
+    logger.info("Unique people found: %d (%d search pages)", len(unique_results), pages_fetched,
+                extra={'company': company_name, 'profiles': len(unique_results),
+                       'search_pages': pages_fetched})
     
-    return limited_results
+    return unique_results
 
-def extract_linkedin_profiles(company_name, location="Hong Kong", limit=10):
-    """Main API function to extract LinkedIn profiles"""
+def extract_linkedin_profiles(company_name, location="Hong Kong", limit=10, on_profile=None,
+                              export_format=None):
+    """
+    Main API function to extract LinkedIn profiles.
+    Profiles are streamed to the export file as they are accepted.
+    """
     try:
-        print(f"Starting LinkedIn profile extraction for: {company_name} in {location}")
+        logger.info("Starting LinkedIn profile extraction for: %s in %s", company_name, location)
+        writer = open_profile_export(company_name, export_format)
+        
+        def export_profile(profile):
+            writer.write(profile_row(profile, company_name))
+            if on_profile is not None:
+                on_profile(profile)
         
-        # Extract profiles
-        profiles = scrape_company_people(company_name, location, limit)
+        # Extract profiles and record them in the local lead store
+        try:
+            profiles = scrape_company_people(company_name, location, limit, on_profile=export_profile)
+            store = get_lead_store()
+            if profiles and store is not None:
+                store.upsert_profiles(profiles, company_name)
+        except Exception:
+            writer.abort()
+            raise
         
         if not profiles:
+            writer.abort()
+            error = 'No LinkedIn profiles found for the specified company'
+            if quota_exhausted():
+                error = 'Daily Custom Search quota exhausted and no cached results for this company'
             return {
                 'success': False,
-                'error': 'No LinkedIn profiles found for the specified company',
+                'error': error,
+                'cache_only': quota_exhausted(),
                 'profiles': [],
                 'count': 0,
                 'filename': None
             }
         
-        # Save to CSV
-        csv_filepath = save_to_csv(profiles, company_name)
+        csv_filepath = writer.commit()
         
         # Return results
         result = {
@@ -376,14 +453,16 @@ def extract_linkedin_profiles(company_name, location="Hong Kong", limit=10):
             'count': len(profiles),
             'company': company_name,
             'filename': os.path.basename(csv_filepath) if csv_filepath else None,
+            'cache_only': quota_exhausted(),
             'message': f'Successfully extracted {len(profiles)} LinkedIn profiles for {company_name}'
         }
         
-        print(f"LinkedIn extraction completed: {len(profiles)} profiles found")
+        logger.info("LinkedIn extraction completed: %d profiles found", len(profiles),
+                    extra={'company': company_name, 'profiles': len(profiles)})
         return result
         
     except Exception as e:
-        print(f"Error during LinkedIn extraction: {e}")
+        logger.error("Error during LinkedIn extraction: %s", e)
         return {
             'success': False,
             'error': str(e),
@@ -392,6 +471,81 @@ def extract_linkedin_profiles(company_name, location="Hong Kong", limit=10):
             'filename': None
         }
 
+def extract_linkedin_profiles_batch(companies, location="Hong Kong", limit=10,
+                                    max_workers=BATCH_MAX_WORKERS, export_format=None,
+                                    on_company=None):
+    """
+    Extract LinkedIn profiles for many companies at once. Companies are
+    searched concurrently under the shared Custom Search QPS limit and
+    daily budget. Returns per-company results and one combined export,
+    written as each company finishes.
+    `on_company` receives each company's result in order; if it raises,
+    companies not yet started are skipped and the exception propagates.
+    """
+    # Drop duplicate company names (case-insensitive), keeping order
+    unique = {}
+    for company in companies:
+        unique.setdefault(company.strip().lower(), company.strip())
+    companies = [c for c in unique.values() if c]
+    logger.info("Starting batch LinkedIn extraction for %d companies in %s", len(companies), location)
+    
+    def run(company):
+        # Build the company's matcher once up front; every candidate reuses it
+        get_matcher(company, 0.6)
+        try:
+            profiles = scrape_company_people(company, location, limit)
+            return {'company': company, 'success': True, 'profiles': profiles,
+                    'count': len(profiles), 'error': None}
+        except Exception as e:
+            logger.error("Error extracting profiles for %s: %s", company, e)
+            return {'company': company, 'success': False, 'profiles': [],
+                    'count': 0, 'error': str(e)}
+    
+    store = get_lead_store()
+    results = []
+    writer = open_profile_export('batch', export_format)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            try:
+                for r in executor.map(run, companies):
+                    results.append(r)
+                    for person in r['profiles']:
+                        writer.write(profile_row(person, r['company']))
+                    if store is not None and r['profiles']:
+                        store.upsert_profiles(r['profiles'], r['company'])
+                    if on_company is not None:
+                        on_company(r)
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+    except Exception:
+        writer.abort()
+        raise
+    
+    all_profiles = [p for r in results for p in r['profiles']]
+    if all_profiles:
+        csv_filepath = writer.commit()
+    else:
+        writer.abort()
+        csv_filepath = None
+    companies_found = sum(1 for r in results if r['count'])
+    logger.info("Batch LinkedIn extraction completed: %d profiles for %d/%d companies",
+                len(all_profiles), companies_found, len(results),
+                extra={'profiles': len(all_profiles), 'companies': len(results),
+                       'companies_found': companies_found})
+    
+    return {
+        'success': bool(all_profiles),
+        'results': results,
+        'count': len(all_profiles),
+        'companies_count': len(results),
+        'failed_companies': [r['company'] for r in results if not r['success']],
+        'filename': os.path.basename(csv_filepath) if csv_filepath else None,
+        'quota_remaining': search_budget.remaining(),
+        'cache_only': quota_exhausted(),
+        'message': f'Extracted {len(all_profiles)} LinkedIn profiles for {len(results)} companies'
+    }
+
 if __name__ == "__main__":
     # Test function
     company = "Microsoft"
@@ -0,0 +1,111 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import sys
+import time
+
+from logging_config import get_logger
+from metrics import stage_totals
+from paths import get_exports_dir
+
+logger = get_logger(__name__)
+
+# Profiling is only available when this is set, and only to requests sending it
+# in the X-Admin-Token header together with ?profile=1
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN', '')
+# Functions listed (by cumulative time) in the response
+PROFILE_TOP_FUNCTIONS = int(os.environ.get('PROFILE_TOP_FUNCTIONS', '10'))
+
+
+def profiling_requested(headers, args) -> bool:
+    """True when a request opts in to profiling and carries the admin token."""
+    if not PROFILE_ADMIN_TOKEN or args.get('profile') not in ('1', 'true'):
+        return False
+    return hmac.compare_digest(headers.get('X-Admin-Token', ''), PROFILE_ADMIN_TOKEN)
+
+
+def stage_snapshot() -> dict:
+    """{stage: (count, seconds)} for Google API endpoints (as "api:<endpoint>") and in-process stages."""
+    snapshot = dict(stage_totals())
+    http_client = sys.modules.get("http_client")
+    if http_client is not None:
+        for endpoint, stats in http_client.latency_stats().items():
+            snapshot[f"api:{endpoint}"] = (stats["count"], stats["sum"])
+    return snapshot
+
+
+class RequestProfile:
+    """
+    Profiles one request: cProfile on the request thread, plus a breakdown
+    by stage (Google API calls per endpoint, matching, export writing) taken
+    from the metrics counters, which include the worker threads. Stage times
+    are process-wide, so concurrent requests are counted too, and API calls
+    made in parallel can add up to more than the wall time.
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.profiler = cProfile.Profile()
+        self.dump_path = None
+        self._before = None
+        self._started = None
+        self.wall = None
+
+    def start(self):
+        self._before = stage_snapshot()
+        self._started = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.wall = time.perf_counter() - self._started
+        self.dump_path = self.dump()
+
+    def dump(self):
+        """Write the full profile (pstats format) next to the exports; returns its path."""
+        directory = os.path.join(get_exports_dir(), "profiles")
+        name = re.sub(r"[^A-Za-z0-9]+", "_", self.route).strip("_") or "request"
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}{int(time.time() * 1000) % 1000:03d}"
+        path = os.path.join(directory, f"{name}-{stamp}-{os.getpid()}.prof")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.profiler.dump_stats(path)
+        except OSError as e:
+            logger.warning("⚠️  Could not write profile %s: %s", path, e)
+            return None
+        logger.info("Profile for %s written to %s", self.route, path)
+        return path
+
+    def stages(self) -> dict:
+        after = stage_snapshot()
+        stages = {}
+        for stage, (count, seconds) in sorted(after.items()):
+            before_count, before_seconds = self._before.get(stage, (0, 0.0))
+            if count > before_count:
+                stages[stage] = {"calls": count - before_count,
+                                 "ms": round((seconds - before_seconds) * 1000, 2)}
+        return stages
+
+    def top_functions(self) -> list[dict]:
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "calls": calls,
+                "own_ms": round(own * 1000, 2),
+                "cumulative_ms": round(cumulative * 1000, 2),
+            })
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        return rows[:PROFILE_TOP_FUNCTIONS]
+
+    def summary(self) -> dict:
+        return {
+            "wall_ms": round(self.wall * 1000, 2),
+            "stages": self.stages(),
+            "top_functions": self.top_functions(),
+            "dump": os.path.basename(self.dump_path) if self.dump_path else None,
+        }
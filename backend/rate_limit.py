@@ -0,0 +1,378 @@
+import os
+import sqlite3
+import threading
+import time
+
+from logging_config import get_logger
+from paths import get_exports_dir
+
+logger = get_logger(__name__)
+
+# Where token buckets and daily budgets live: "sqlite" shares them between every
+# worker process on the host, "memory" keeps them per process
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'sqlite').lower()
+RATE_LIMIT_STORE_PATH = os.environ.get('RATE_LIMIT_STORE_PATH')
+# Calls a bucket may make back to back after being idle
+RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', '1'))
+
+# AIMD: on throttling the allowed rate is multiplied by AIMD_DECREASE (never below
+# AIMD_MIN_FRACTION of the configured rate); each success adds AIMD_INCREASE of it back
+AIMD_DECREASE = float(os.environ.get('AIMD_DECREASE', '0.5'))
+AIMD_INCREASE = float(os.environ.get('AIMD_INCREASE', '0.05'))
+AIMD_MIN_FRACTION = float(os.environ.get('AIMD_MIN_FRACTION', '0.1'))
+
+# Requests per second allowed per Google API endpoint (0 = unlimited)
+ENDPOINT_RATES = {
+    "geocode": float(os.environ.get('GEOCODE_REQUESTS_PER_SECOND', '10')),
+    "nearbysearch": float(os.environ.get('NEARBY_REQUESTS_PER_SECOND', '10')),
+    "details": float(os.environ.get('DETAILS_REQUESTS_PER_SECOND', '5')),
+    "customsearch": float(os.environ.get('CUSTOM_SEARCH_QPS', '1.5')),
+}
+# Daily call budgets per Maps endpoint (0 = unlimited); Custom Search has its
+# own budget (CUSTOM_SEARCH_DAILY_QUOTA) with a cache-only fallback
+ENDPOINT_DAILY_QUOTAS = {
+    "geocode": int(os.environ.get('GEOCODE_DAILY_QUOTA', '0')),
+    "nearbysearch": int(os.environ.get('NEARBY_DAILY_QUOTA', '0')),
+    "details": int(os.environ.get('DETAILS_DAILY_QUOTA', '0')),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    rate REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budgets (
+    name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    exhausted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, day)
+);
+"""
+
+_store = None
+_store_lock = threading.Lock()
+_limiters = {}
+_budgets = {}
+_registry_lock = threading.Lock()
+
+
+def utc_day() -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+def refill(tokens: float, updated: float, rate: float, burst: float, now: float) -> float:
+    """Tokens in a bucket at `now`, topped up at `rate` per second since `updated`."""
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces out calls to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        """Block until the caller is allowed to make its next request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a daily API quota budget has been used up."""
+
+
+class MemoryRateStore:
+    """Token buckets and daily budgets for this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._budgets = {}
+
+    def reserve(self, name: str, max_rate: float, burst: float):
+        """Take a token; returns (seconds to wait for it, current rate)."""
+        now = time.time()
+        with self._lock:
+            tokens, updated, rate = self._buckets.get(name, (burst, now, max_rate))
+            rate = min(rate, max_rate)
+            tokens = refill(tokens, updated, rate, burst, now) - 1
+            self._buckets[name] = (tokens, now, rate)
+        return max(0.0, -tokens / rate), rate
+
+    def adjust_rate(self, name: str, max_rate: float, min_rate: float,
+                    factor: float = 1.0, step: float = 0.0) -> float:
+        now = time.time()
+        with self._lock:
+            tokens, updated, rate = self._buckets.get(name, (0.0, now, max_rate))
+            rate = max(min_rate, min(max_rate, rate * factor + step))
+            self._buckets[name] = (tokens, updated, rate)
+        return rate
+
+    def consume(self, name: str, calls: int, daily_limit: int) -> bool:
+        day = utc_day()
+        with self._lock:
+            used, exhausted = self._budgets.get((name, day), (0, False))
+            if exhausted or (daily_limit and used + calls > daily_limit):
+                return False
+            if (name, day) not in self._budgets:
+                self._budgets = {k: v for k, v in self._budgets.items() if k[1] == day}
+            self._budgets[(name, day)] = (used + calls, False)
+        return True
+
+    def exhaust(self, name: str):
+        day = utc_day()
+        with self._lock:
+            used, _ = self._budgets.get((name, day), (0, False))
+            self._budgets[(name, day)] = (used, True)
+
+    def usage(self, name: str):
+        """(calls used today, whether the budget was marked exhausted)."""
+        with self._lock:
+            return self._budgets.get((name, utc_day()), (0, False))
+
+
+class SQLiteRateStore:
+    """
+    Token buckets and daily budgets in a SQLite file, so every process on the
+    host draws from the same buckets. Each update is one short IMMEDIATE
+    transaction; tokens can go negative, which queues callers behind each other.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def reserve(self, name: str, max_rate: float, burst: float):
+        """Take a token; returns (seconds to wait for it, current rate)."""
+        def work(conn):
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated, rate FROM buckets WHERE name = ?",
+                               (name,)).fetchone()
+            tokens, updated, rate = row if row is not None else (burst, now, max_rate)
+            rate = min(rate, max_rate)
+            tokens = refill(tokens, updated, rate, burst, now) - 1
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated, rate) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, "
+                "updated = excluded.updated, rate = excluded.rate",
+                (name, tokens, now, rate))
+            return max(0.0, -tokens / rate), rate
+        return self._transaction(work)
+
+    def adjust_rate(self, name: str, max_rate: float, min_rate: float,
+                    factor: float = 1.0, step: float = 0.0) -> float:
+        def work(conn):
+            row = conn.execute("SELECT rate FROM buckets WHERE name = ?", (name,)).fetchone()
+            rate = row[0] if row is not None else max_rate
+            rate = max(min_rate, min(max_rate, rate * factor + step))
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated, rate) VALUES (?, 0, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET rate = excluded.rate",
+                (name, time.time(), rate))
+            return rate
+        return self._transaction(work)
+
+    def consume(self, name: str, calls: int, daily_limit: int) -> bool:
+        day = utc_day()
+
+        def work(conn):
+            row = conn.execute("SELECT used, exhausted FROM budgets WHERE name = ? AND day = ?",
+                               (name, day)).fetchone()
+            used, exhausted = row if row is not None else (0, 0)
+            if exhausted or (daily_limit and used + calls > daily_limit):
+                return False
+            if row is None:
+                conn.execute("DELETE FROM budgets WHERE name = ? AND day <> ?", (name, day))
+            conn.execute(
+                "INSERT INTO budgets (name, day, used) VALUES (?, ?, ?) "
+                "ON CONFLICT(name, day) DO UPDATE SET used = excluded.used",
+                (name, day, used + calls))
+            return True
+        return self._transaction(work)
+
+    def exhaust(self, name: str):
+        day = utc_day()
+        self._transaction(lambda conn: conn.execute(
+            "INSERT INTO budgets (name, day, used, exhausted) VALUES (?, ?, 0, 1) "
+            "ON CONFLICT(name, day) DO UPDATE SET exhausted = 1", (name, day)))
+
+    def usage(self, name: str):
+        """(calls used today, whether the budget was marked exhausted)."""
+        with self._lock:
+            row = self._conn.execute("SELECT used, exhausted FROM budgets WHERE name = ? AND day = ?",
+                                     (name, utc_day())).fetchone()
+        return (row[0], bool(row[1])) if row is not None else (0, False)
+
+
+def get_rate_store():
+    """Shared store for RATE_LIMIT_STORE, created on first use (memory if SQLite is unavailable)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if RATE_LIMIT_STORE == "sqlite":
+                path = RATE_LIMIT_STORE_PATH or os.path.join(get_exports_dir(), "rate_limits.sqlite3")
+                try:
+                    _store = SQLiteRateStore(path)
+                except sqlite3.Error as e:
+                    logger.warning("⚠️  Rate limit store unavailable (%s), limiting per process", e)
+                    _store = MemoryRateStore()
+            else:
+                _store = MemoryRateStore()
+        return _store
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket allowing `rate` calls per second to one API, shared by every
+    process using the same rate-limit store. The allowed rate adapts (AIMD):
+    it is cut by AIMD_DECREASE when the API reports throttling and grows back
+    towards `rate` with each successful call.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float = RATE_LIMIT_BURST, store=None):
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = rate * AIMD_MIN_FRACTION
+        self.burst = max(1.0, burst)
+        self.current_rate = rate
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_rate_store()
+        return self._store
+
+    def wait(self):
+        """Block until the next call to this API is allowed."""
+        if self.max_rate <= 0:
+            return
+        try:
+            delay, self.current_rate = self.store.reserve(self.name, self.max_rate, self.burst)
+        except sqlite3.Error as e:
+            # Don't fail requests over the limiter; the API's own throttling still applies
+            logger.warning("⚠️  Rate limit store error for %s: %s", self.name, e)
+            return
+        if delay > 0:
+            time.sleep(delay)
+
+    def succeeded(self):
+        if self.max_rate <= 0 or self.current_rate >= self.max_rate:
+            return
+        self._adjust(step=self.max_rate * AIMD_INCREASE)
+
+    def throttled(self):
+        if self.max_rate <= 0:
+            return
+        self._adjust(factor=AIMD_DECREASE)
+        logger.warning("⚠️  %s throttled, slowing to %.2f requests/s", self.name, self.current_rate)
+
+    def _adjust(self, factor: float = 1.0, step: float = 0.0):
+        try:
+            self.current_rate = self.store.adjust_rate(
+                self.name, self.max_rate, self.min_rate, factor=factor, step=step)
+        except sqlite3.Error as e:
+            logger.warning("⚠️  Rate limit store error for %s: %s", self.name, e)
+
+
+class QuotaBudget:
+    """Daily call budget that resets at midnight UTC, kept in the rate-limit store."""
+
+    def __init__(self, name: str, daily_limit: int, store=None):
+        self.name = name
+        self.daily_limit = daily_limit
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_rate_store()
+        return self._store
+
+    def consume(self, calls: int = 1):
+        """Reserve `calls` from today's budget or raise QuotaExceededError."""
+        try:
+            allowed = self.store.consume(self.name, calls, self.daily_limit)
+        except sqlite3.Error as e:
+            logger.warning("⚠️  Rate limit store error for %s: %s", self.name, e)
+            return
+        if not allowed:
+            raise QuotaExceededError(
+                f"Daily {self.name} quota of {self.daily_limit} calls exhausted")
+
+    def exhaust(self):
+        """Treat today's budget as used up, e.g. after the API itself reports its quota exceeded."""
+        try:
+            self.store.exhaust(self.name)
+        except sqlite3.Error as e:
+            logger.warning("⚠️  Rate limit store error for %s: %s", self.name, e)
+
+    @property
+    def used(self) -> int:
+        return self.store.usage(self.name)[0]
+
+    def remaining(self) -> int:
+        used, exhausted = self.store.usage(self.name)
+        if exhausted:
+            return 0
+        return max(0, self.daily_limit - used) if self.daily_limit else None
+
+
+def get_limiter(endpoint: str):
+    """Shared TokenBucketLimiter for a Google API endpoint, or None if it has no rate limit."""
+    rate = ENDPOINT_RATES.get(endpoint, 0)
+    if rate <= 0:
+        return None
+    with _registry_lock:
+        if endpoint not in _limiters:
+            _limiters[endpoint] = TokenBucketLimiter(endpoint, rate)
+        return _limiters[endpoint]
+
+
+def get_budget(endpoint: str):
+    """Shared QuotaBudget for a Maps endpoint, or None if it has no daily quota configured."""
+    daily_limit = ENDPOINT_DAILY_QUOTAS.get(endpoint, 0)
+    if daily_limit <= 0:
+        return None
+    with _registry_lock:
+        if endpoint not in _budgets:
+            _budgets[endpoint] = QuotaBudget(endpoint, daily_limit)
+        return _budgets[endpoint]
+
+
+def limiter_rates() -> dict:
+    """{endpoint: requests per second currently allowed} for limiters in use."""
+    with _registry_lock:
+        limiters = dict(_limiters)
+    return {endpoint: limiter.current_rate for endpoint, limiter in limiters.items()}
@@ -0,0 +1,69 @@
+import json
+import queue
+import threading
+
+SSE_MIMETYPE = "text/event-stream"
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+_DONE = object()
+
+
+class StreamClosed(Exception):
+    """Raised inside the producer once the client has gone away."""
+
+
+def choose_format(fmt: str = None, accept: str = "") -> str:
+    """Pick "sse" or "ndjson" from an explicit format or the Accept header."""
+    if fmt in ("sse", "ndjson"):
+        return fmt
+    return "sse" if SSE_MIMETYPE in (accept or "") else "ndjson"
+
+
+def encode_event(event: dict, fmt: str) -> str:
+    payload = json.dumps(event, default=str)
+    if fmt == "sse":
+        return f"event: {event.get('type', 'message')}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+def stream_events(produce, fmt: str = "ndjson"):
+    """
+    Run `produce(emit)` in a background thread and yield each event it emits,
+    encoded as SSE or NDJSON, as soon as it is available. If the consumer
+    stops iterating, the next `emit` call raises StreamClosed.
+    """
+    events = queue.Queue()
+    closed = threading.Event()
+
+    def emit(event: dict):
+        if closed.is_set():
+            raise StreamClosed()
+        events.put(event)
+
+    def run():
+        try:
+            produce(emit)
+        except StreamClosed:
+            pass
+        except Exception as e:
+            events.put({"type": "error", "error": str(e)})
+        finally:
+            events.put(_DONE)
+
+    threading.Thread(target=run, name="stream-producer", daemon=True).start()
+    try:
+        while True:
+            event = events.get()
+            if event is _DONE:
+                break
+            yield encode_event(event, fmt)
+    finally:
+        closed.set()
+
+
+def stream_headers(fmt: str) -> dict:
+    return {
+        "Content-Type": SSE_MIMETYPE if fmt == "sse" else NDJSON_MIMETYPE,
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    }
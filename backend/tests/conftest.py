@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Backend modules are imported flat (as app.py does), so put backend/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep tests off the shared on-disk stores: memory-only caches, rate limits and
+# jobs, no lead store, and no real API keys needed
+for name in ("GEOCODE_CACHE_PATH", "DETAILS_CACHE_PATH", "SEARCH_CACHE_PATH"):
+    os.environ[name] = ""
+os.environ["RATE_LIMIT_STORE"] = "memory"
+os.environ["JOB_STORE"] = "memory"
+os.environ["LEAD_STORE_ENABLED"] = "0"
+os.environ["PAGE_TOKEN_DELAY"] = "0"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("GOOGLE_MAPS_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID"):
+    os.environ.setdefault(name, "test")
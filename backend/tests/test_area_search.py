@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+import app
+import area_search
+from area_search import MAX_TILES, count_tiles, grid_tiles, tiled_search
+
+BOUNDS = {"south": 22.275, "west": 114.150, "north": 22.290, "east": 114.170}
+
+
+def lead_request(**extra):
+    return dict({"keywords": "coffee", "location": "Central"}, **extra)
+
+
+def test_grid_tiles_is_lazy_and_matches_count():
+    tiles = grid_tiles(BOUNDS, 500)
+    assert not isinstance(tiles, list)
+    assert len(list(tiles)) == count_tiles(BOUNDS, 500)
+
+
+@pytest.mark.parametrize("bounds", [
+    {"south": 22.290, "west": 114.150, "north": 22.275, "east": 114.170},
+    {"south": 22.275, "west": 114.170, "north": 22.290, "east": 114.150},
+    {"south": 22.275, "west": 114.150, "north": 95, "east": 114.170},
+    {"south": 22.275, "west": 114.150, "north": True, "east": 114.170},
+])
+def test_inverted_or_invalid_bounds_are_rejected(bounds):
+    params, error = app.parse_lead_request(lead_request(bounds=bounds))
+    assert params is None and "bounds" in error
+
+
+@pytest.mark.parametrize("polygon", [
+    [[22.275, 114.150], [22.290, "x"], [22.290, 114.170]],
+    [[22.275, 114.150], [22.290, None], [22.290, 114.170]],
+    [[22.275, 114.150], [22.290, [1]], [22.290, 114.170]],
+    [[22.275, 114.150], [22.290, 114.150]],
+])
+def test_polygon_points_must_be_number_pairs(polygon):
+    params, error = app.parse_lead_request(lead_request(polygon=polygon))
+    assert params is None and "polygon" in error
+
+
+def test_oversized_area_is_rejected_before_any_api_call(monkeypatch):
+    def search_pages(*args, **kwargs):
+        raise AssertionError("search ran for a rejected area")
+
+    import lead_extractor
+    monkeypatch.setattr(lead_extractor, "search_pages", search_pages)
+    hong_kong = {"south": 22.15, "west": 113.83, "north": 22.56, "east": 114.41}
+    assert count_tiles(hong_kong, 100) > MAX_TILES
+    client = app.app.test_client()
+    for url in ("/api/extract-leads", "/api/extract-leads/stream"):
+        resp = client.post(url, json=lead_request(bounds=hong_kong, tile_radius=100))
+        assert resp.status_code == 400
+        assert "tiles" in resp.get_json()["error"]
+
+    params, error = app.parse_lead_request(lead_request(bounds=hong_kong, tile_radius=5000))
+    assert error is None and params["tile_radius"] == 5000
+
+
+def test_tiled_search_refuses_too_many_tiles(monkeypatch):
+    monkeypatch.setattr(area_search, "MAX_TILES", 2)
+    with pytest.raises(ValueError):
+        list(tiled_search(lambda lat, lng, radius: [], bounds=BOUNDS, radius=500))
+
+
+def test_tiled_search_submits_tiles_as_workers_free_up(monkeypatch):
+    produced = []
+    original = area_search.grid_tiles
+
+    def counting_grid_tiles(*args, **kwargs):
+        # The first call only counts the tiles for progress totals
+        calls = len(produced)
+        produced.append(0)
+        for tile in original(*args, **kwargs):
+            produced[calls] += 1
+            yield tile
+
+    monkeypatch.setattr(area_search, "grid_tiles", counting_grid_tiles)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    def search(lat, lng, radius):
+        started.release()
+        release.wait(5)
+        return [{"place_id": f"{lat:.6f},{lng:.6f}"}]
+
+    progress = []
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(
+        tiled_search(search, bounds=BOUNDS, radius=500, max_workers=2, progress=progress.append)))
+    runner.start()
+    try:
+        assert started.acquire(timeout=5) and started.acquire(timeout=5)
+        deadline = time.monotonic() + 2
+        while produced[1] < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        total = count_tiles(BOUNDS, 500)
+        assert total > 4
+        # Two running tiles plus one queued behind each worker
+        assert produced[1] == 4
+    finally:
+        release.set()
+        runner.join(5)
+    assert sum(len(batch) for batch in results) == total
+    assert progress[-1]["completed"] == progress[-1]["total"] == total
+
+
+@pytest.mark.parametrize("extra, tiled", [({}, False), ({"bounds": BOUNDS}, True)])
+def test_stream_reports_progress_only_for_tiled_searches(monkeypatch, extra, tiled):
+    seen = {}
+
+    def extract_leads(**kwargs):
+        seen["progress"] = kwargs["progress"]
+        return {"filename": None, "records_count": 0}
+
+    import lead_extractor
+    monkeypatch.setattr(lead_extractor, "extract_leads", extract_leads)
+    resp = app.app.test_client().post("/api/extract-leads/stream?format=ndjson",
+                                      json=lead_request(keywords=f"progress {tiled}", **extra))
+    resp.get_data()
+    assert (seen["progress"] is not None) == tiled
@@ -0,0 +1,89 @@
+"""
+CompanyMatcher must make the same decisions as the original SequenceMatcher
+scan it replaced: fixtures/company_match_golden.json holds that scan's
+accept/reject decisions (and accepting scores) for realistic LinkedIn
+titles, and legacy_company_name_matches below is the scan itself, used to
+check randomly generated pairs too.
+"""
+import json
+import os
+import random
+import re
+from difflib import SequenceMatcher
+
+import pytest
+
+from company_matcher import CompanyMatcher, normalize_company_name
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "company_match_golden.json")
+
+
+def legacy_company_name_matches(company_name, title, threshold=0.6):
+    """The matcher as it was before company_matcher.py (without the debug prints)."""
+    def calculate_similarity(text1, text2):
+        return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
+
+    title_lower = title.lower()
+    company_variations = [company_name.lower(), normalize_company_name(company_name).lower()]
+    base_name = normalize_company_name(company_name)
+    if base_name != company_name:
+        company_variations.append(base_name.lower())
+    seen = set()
+    company_variations = [x for x in company_variations if not (x in seen or seen.add(x))]
+
+    for variation in company_variations:
+        if re.search(r'\b' + re.escape(variation) + r'\b', title_lower):
+            return True, 1.0
+    for variation in company_variations:
+        if f' at {variation}' in title_lower or f'@ {variation}' in title_lower or f'at {variation}' in title_lower:
+            return True, 1.0
+    for variation in company_variations:
+        for company_word in variation.split():
+            if len(company_word) < 4:
+                continue
+            for title_word in title_lower.split():
+                similarity = calculate_similarity(company_word, title_word)
+                if similarity >= threshold:
+                    return True, similarity
+    max_similarity = 0
+    for variation in company_variations:
+        for i in range(len(title_lower) - len(variation) + 1):
+            similarity = calculate_similarity(variation, title_lower[i:i + len(variation)])
+            if similarity > max_similarity:
+                max_similarity = similarity
+    return max_similarity >= threshold, max_similarity
+
+
+def load_golden():
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        return json.load(f)["cases"]
+
+
+@pytest.mark.parametrize("case", load_golden(), ids=lambda case: f"{case['company']}|{case['text'][:40]}")
+def test_golden_decisions(case):
+    matches, score = CompanyMatcher(case["company"], case["threshold"]).match(case["text"], verbose=False)
+    assert matches == case["matches"]
+    if matches:
+        assert score == pytest.approx(case["score"], abs=1e-6)
+
+
+def test_golden_set_covers_both_decisions():
+    decisions = [case["matches"] for case in load_golden()]
+    assert decisions.count(True) >= 100 and decisions.count(False) >= 100
+
+
+def random_text(rng, alphabet="abcdefghijklmnop &.-", max_length=40):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+
+def test_matches_legacy_on_random_pairs():
+    rng = random.Random(11)
+    for _ in range(2000):
+        company = random_text(rng, max_length=20) + rng.choice(["", " Ltd", " HK", " Limited", " Co."])
+        title = random_text(rng)
+        threshold = rng.choice([0.5, 0.6, 0.7, 0.8])
+        expected, expected_score = legacy_company_name_matches(company, title, threshold)
+        matches, score = CompanyMatcher(company, threshold).match(title, verbose=False)
+        assert matches == expected, (company, title, threshold)
+        if matches:
+            assert score == pytest.approx(expected_score), (company, title, threshold)
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+import requests
+
+import people_extractor
+from cache import TieredCache
+from rate_limit import MemoryRateStore, QuotaBudget
+
+
+def response(status: int, body: dict) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps(body).encode("utf-8")
+    return resp
+
+
+def google_error(reason: str) -> dict:
+    return {"error": {"code": 429, "message": reason, "errors": [{"reason": reason}]}}
+
+
+@pytest.fixture
+def search(monkeypatch):
+    """google_search with a fresh budget and cache; queue responses in the returned list."""
+    budget = QuotaBudget("Custom Search", 100, store=MemoryRateStore())
+    monkeypatch.setattr(people_extractor, "search_budget", budget)
+    monkeypatch.setattr(people_extractor, "_search_cache",
+                        TieredCache("custom_search_test", maxsize=16, ttl=3600))
+    responses, calls = [], []
+
+    def fake_get(endpoint, url, params=None, timeout=10):
+        calls.append(params["q"])
+        return responses.pop(0)
+
+    monkeypatch.setattr(people_extractor.http_client, "get", fake_get)
+    return responses, calls, budget
+
+
+def test_rate_limit_429_does_not_end_the_day(search):
+    responses, calls, budget = search
+    responses.append(response(429, google_error("rateLimitExceeded")))
+    assert people_extractor.google_search("q1", "key", "cx") == []
+    assert budget.remaining() == 99
+
+    responses.append(response(200, {"items": [{"title": "hit"}]}))
+    assert people_extractor.google_search("q2", "key", "cx") == [{"title": "hit"}]
+    assert calls == ["q1", "q2"]
+
+
+@pytest.mark.parametrize("reason", sorted(people_extractor.DAILY_QUOTA_REASONS))
+def test_daily_quota_429_exhausts_the_budget(search, reason):
+    responses, calls, budget = search
+    responses.append(response(429, google_error(reason)))
+    assert people_extractor.google_search("q1", "key", "cx") == []
+    assert budget.remaining() == 0
+
+    assert people_extractor.google_search("q2", "key", "cx") == []
+    assert calls == ["q1"]
+
+
+def test_429_without_error_body_is_a_rate_limit(search):
+    responses, _, budget = search
+    responses.append(requests.Response())
+    responses[0].status_code = 429
+    responses[0]._content = b"Too Many Requests"
+    people_extractor.google_search("q1", "key", "cx")
+    assert budget.remaining() == 99
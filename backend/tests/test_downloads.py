@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+
+import app
+import downloads
+
+
+@pytest.fixture
+def export(monkeypatch, tmp_path):
+    monkeypatch.setattr(downloads, "get_exports_dir", lambda: str(tmp_path))
+    body = "Name,Title\n" + "".join(f"Person {i},Engineer\n" for i in range(200))
+    (tmp_path / "leads.csv").write_text(body)
+    return tmp_path, body.encode()
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_range_request_returns_partial_content_uncompressed(export, client):
+    _, body = export
+    resp = client.get("/api/download/leads.csv",
+                      headers={"Range": "bytes=0-9", "Accept-Encoding": "gzip"})
+    assert resp.status_code == 206
+    assert resp.data == body[:10]
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_etag_revalidation_answers_304(export, client):
+    first = client.get("/api/download/leads.csv")
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = client.get("/api/download/leads.csv", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+
+def test_gzip_download_and_immutable_versioned_name(export, client):
+    _, body = export
+    resp = client.get("/api/download/leads.csv", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(resp.data) == body
+
+    url = downloads.download_url("leads.csv")
+    assert url != "/api/download/leads.csv"
+    versioned = client.get(url)
+    assert versioned.status_code == 200 and "immutable" in versioned.headers["Cache-Control"]
+
+
+def test_stale_versioned_name_is_gone(export, client):
+    tmp_path, _ = export
+    url = downloads.download_url("leads.csv")
+    (tmp_path / "leads.csv").write_text("Name,Title\nSomeone else,CEO\n")
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.parametrize("name", ["leads.sqlite3", "leads.csv.123.tmp", "leads.csv.123.partial",
+                                  ".compressed", "..%2Fleads.csv"])
+def test_non_export_files_are_not_served(export, client, name):
+    tmp_path, _ = export
+    (tmp_path / "leads.sqlite3").write_text("not an export")
+    (tmp_path / "leads.csv.123.tmp").write_text("in progress")
+    assert client.get(f"/api/download/{name}").status_code == 404
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+import people_extractor
+from export_writer import ExportWriter, read_export
+
+FIELDS = ["Name", "Title"]
+ROW = {"Name": "Ada", "Title": "Engineer"}
+
+
+def files(path):
+    return sorted(p.name for p in path.iterdir())
+
+
+def test_commit_moves_the_finished_file_into_place(tmp_path):
+    path = str(tmp_path / "people.csv")
+    writer = ExportWriter(path, FIELDS)
+    writer.write(ROW)
+    assert not os.path.exists(path)
+    assert writer.commit() == path
+    assert files(tmp_path) == ["people.csv"]
+    fields, rows = read_export(path)
+    assert fields == FIELDS and list(rows) == [ROW]
+
+
+def test_abort_keeps_written_rows_as_partial(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ExportWriter(str(tmp_path / "people.csv"), FIELDS) as writer:
+            writer.write(ROW)
+            raise RuntimeError("scrape failed")
+    assert [name.endswith(".partial") for name in files(tmp_path)] == [True]
+
+
+def test_abort_without_rows_leaves_nothing(tmp_path):
+    ExportWriter(str(tmp_path / "people.csv"), FIELDS).abort()
+    assert files(tmp_path) == []
+
+
+def test_lead_store_failure_aborts_the_profile_export(monkeypatch, tmp_path):
+    profile = {"name": "Ada", "role_title": "Engineer", "company": "Acme",
+               "linkedin_url": "https://www.linkedin.com/in/ada"}
+
+    def scrape_company_people(company_name, location, limit, on_profile=None):
+        on_profile(profile)
+        return [profile]
+
+    class BrokenStore:
+        def upsert_profiles(self, profiles, company_name):
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(people_extractor, "get_exports_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(people_extractor, "scrape_company_people", scrape_company_people)
+    monkeypatch.setattr(people_extractor, "get_lead_store", lambda: BrokenStore())
+
+    result = people_extractor.extract_linkedin_profiles("Acme")
+    assert result["success"] is False and "locked" in result["error"]
+    names = files(tmp_path)
+    assert len(names) == 1 and names[0].endswith(".partial")
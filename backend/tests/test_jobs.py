@@ -0,0 +1,60 @@
+import threading
+import time
+
+import lead_extractor
+from jobs import CANCELLED, JobManager, MemoryJobStore
+
+PLACES = [{"place_id": f"place-{i}"} for i in range(20)]
+
+
+class SlowDetails:
+    """A Details fetch that takes `delay` seconds and counts its calls."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, place_id, fields=None):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {"place_id": place_id, "name": place_id}
+
+
+def test_closing_details_early_skips_queued_lookups():
+    fetch = SlowDetails()
+    results = lead_extractor.iter_place_details([PLACES], max_workers=2, fetch=fetch)
+    next(results)
+    started = time.monotonic()
+    results.close()
+    # Only the lookups already running are waited for
+    assert time.monotonic() - started < 0.5
+    time.sleep(0.2)
+    assert fetch.calls <= 4
+
+
+def test_cancelled_job_stops_fetching_details(monkeypatch, tmp_path):
+    fetch = SlowDetails()
+    monkeypatch.setattr(lead_extractor, "search_pages", lambda *args, **kwargs: iter([PLACES]))
+    monkeypatch.setattr(lead_extractor, "fetch_place_details", fetch)
+    monkeypatch.setattr(lead_extractor, "get_exports_dir", lambda: str(tmp_path))
+
+    manager = JobManager(MemoryJobStore(), max_workers=1)
+    manager.register("extract-leads", lambda params, context: lead_extractor.extract_leads(
+        "cancel test", "Central", on_record=context.add_result, max_workers=2))
+    job = manager.submit("extract-leads", {})
+
+    deadline = time.monotonic() + 5
+    while not manager.get(job["id"])["partial_results"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    manager.cancel(job["id"])
+    while manager.get(job["id"])["status"] != CANCELLED and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert manager.get(job["id"])["status"] == CANCELLED
+    calls = fetch.calls
+    time.sleep(0.2)
+    assert fetch.calls == calls < len(PLACES)
+    # The rows written so far are kept aside, never as a finished export
+    assert [p.suffix for p in tmp_path.iterdir()] == [".partial"]
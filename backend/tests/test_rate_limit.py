@@ -0,0 +1,105 @@
+import sqlite3
+
+import pytest
+
+import lead_extractor
+from area_search import tiled_search
+from rate_limit import (AIMD_DECREASE, AIMD_MIN_FRACTION, MemoryRateStore, QuotaBudget,
+                        QuotaExceededError, SQLiteRateStore, TokenBucketLimiter)
+
+
+def test_aimd_halves_on_throttling_and_recovers():
+    limiter = TokenBucketLimiter("test", 10, store=MemoryRateStore())
+    limiter.throttled()
+    assert limiter.current_rate == pytest.approx(10 * AIMD_DECREASE)
+    for _ in range(20):
+        limiter.throttled()
+    assert limiter.current_rate == pytest.approx(10 * AIMD_MIN_FRACTION)
+    for _ in range(100):
+        limiter.succeeded()
+    assert limiter.current_rate == pytest.approx(10)
+
+
+def test_sqlite_store_is_shared_between_processes(tmp_path):
+    # Two stores on one file stand in for two worker processes
+    path = str(tmp_path / "rate_limits.sqlite3")
+    first, second = SQLiteRateStore(path), SQLiteRateStore(path)
+    QuotaBudget("details", 3, store=first).consume(2)
+    budget = QuotaBudget("details", 3, store=second)
+    budget.consume()
+    with pytest.raises(QuotaExceededError):
+        budget.consume()
+
+    first_wait, _ = first.reserve("geocode", 10, 1)
+    second_wait, _ = second.reserve("geocode", 10, 1)
+    assert first_wait == 0
+    assert second_wait == pytest.approx(0.1, abs=0.02)
+
+
+class BrokenStore(MemoryRateStore):
+    def _fail(self, *args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    reserve = adjust_rate = consume = exhaust = _fail
+
+
+def test_store_errors_do_not_fail_calls():
+    store = BrokenStore()
+    limiter = TokenBucketLimiter("test", 10, store=store)
+    limiter.wait()
+    limiter.throttled()
+    budget = QuotaBudget("test", 1, store=store)
+    budget.consume()
+    budget.exhaust()
+
+
+def test_details_quota_stops_the_extraction_loop():
+    def fetch(place_id):
+        raise QuotaExceededError("Daily details quota of 1 calls exhausted")
+
+    pages = [[{"place_id": "a"}, {"place_id": "b"}]]
+    with pytest.raises(QuotaExceededError):
+        list(lead_extractor.iter_place_details(pages, max_workers=2, fetch=fetch))
+
+
+def test_other_details_errors_are_yielded():
+    def fetch(place_id):
+        raise ValueError("bad place")
+
+    results = list(lead_extractor.iter_place_details([[{"place_id": "a"}]], fetch=fetch))
+    assert isinstance(results[0][2], ValueError)
+
+
+def test_tiled_search_raises_quota_errors():
+    def search(lat, lng, radius):
+        raise QuotaExceededError("Daily nearbysearch quota of 1 calls exhausted")
+
+    bounds = {"south": 22.275, "west": 114.150, "north": 22.284, "east": 114.160}
+    with pytest.raises(QuotaExceededError):
+        list(tiled_search(search, bounds=bounds, radius=500, progress=lambda tile: None))
+
+
+@pytest.fixture
+def out_of_details_quota(monkeypatch):
+    def fetch_place_details(place_id, fields):
+        raise QuotaExceededError("Daily details quota of 1 calls exhausted")
+
+    monkeypatch.setattr(lead_extractor, "search_pages",
+                        lambda *args, **kwargs: iter([[{"place_id": "a"}, {"place_id": "b"}]]))
+    monkeypatch.setattr(lead_extractor, "fetch_place_details", fetch_place_details)
+
+
+def test_extract_leads_answers_429_when_details_quota_is_used_up(out_of_details_quota):
+    import app
+    resp = app.app.test_client().post("/api/extract-leads",
+                                      json={"keywords": "quota test", "location": "Central"})
+    assert resp.status_code == 429
+    assert "quota" in resp.get_json()["error"]
+
+
+def test_stream_reports_the_quota_error(out_of_details_quota):
+    import app
+    resp = app.app.test_client().post("/api/extract-leads/stream?format=ndjson",
+                                      json={"keywords": "quota stream test", "location": "Central"})
+    assert '"type": "error"' in resp.get_data(as_text=True)
+    assert "quota" in resp.get_data(as_text=True)
@@ -6,6 +6,12 @@ import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 
+// Background jobs need a job store shared by every backend instance (JOB_STORE=sqlite on
+// one long-running host); serverless deployments keep the synchronous endpoint.
+const USE_BACKGROUND_JOBS = import.meta.env.VITE_USE_BACKGROUND_JOBS === 'true';
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
 const recentExtractions = [
   {
     id: 1,
@@ -128,7 +134,8 @@ export default function LeadsPage() {
     try {
       addDebugLog(`🚀 Starting extraction with keywords: "${keywords}", location: "${location}"`);
       addDebugLog(`🌐 Backend URL: ${API_BASE_URL}`);
-      addDebugLog(`📡 Making request to: ${API_BASE_URL}/api/extract-leads`);
+      const endpoint = USE_BACKGROUND_JOBS ? '/api/jobs/extract-leads' : '/api/extract-leads';
+      addDebugLog(`📡 ${USE_BACKGROUND_JOBS ? 'Submitting job' : 'Making request'} to: ${API_BASE_URL}${endpoint}`);
 
       const requestBody = {
         keywords: keywords.trim(),
@@ -146,7 +153,8 @@ export default function LeadsPage() {
         controller.abort();
       }, 30000);
 
-      const response = await fetch(`${API_BASE_URL}/api/extract-leads`, {
+      // In job mode the backend queues the extraction and answers with a job id right away
+      const response = await fetch(`${API_BASE_URL}${endpoint}`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -172,21 +180,66 @@ export default function LeadsPage() {
       }
 
       addDebugLog(`📥 Reading response JSON...`);
-      const result = await response.json();
-      addDebugLog(`📋 Response data: ${JSON.stringify(result, null, 2)}`);
+      if (!USE_BACKGROUND_JOBS) {
+        const result = await response.json();
+        addDebugLog(`📋 Response data: ${JSON.stringify(result, null, 2)}`);
+        if (result.success) {
+          addDebugLog(`✅ Extraction successful: ${result.message}`);
+          setExtractionResult({
+            success: true,
+            message: result.message,
+            data: result.data
+          });
+        } else {
+          addDebugLog(`❌ Extraction failed: ${result.error}`);
+          setExtractionResult({
+            success: false,
+            message: result.error || 'An error occurred during extraction'
+          });
+        }
+        return;
+      }
+
+      let job = await response.json();
+      addDebugLog(`🧾 Job queued: ${job.job_id}`);
+
+      // Poll the job until it finishes, giving up after JOB_POLL_TIMEOUT_MS
+      const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() > deadline) {
+          throw new Error(`Job ${job.job_id} did not finish within ${JOB_POLL_TIMEOUT_MS / 60000} minutes (last status: ${job.status})`);
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const pollResponse = await fetch(`${API_BASE_URL}${job.status_url}`, {
+          method: 'GET',
+          headers: { 'Accept': 'application/json' },
+          mode: 'cors',
+        });
+        if (pollResponse.status === 404) {
+          throw new Error(`Job ${job.job_id} is no longer known to the backend; is a shared job store (JOB_STORE=sqlite) configured?`);
+        }
+        if (!pollResponse.ok) {
+          throw new Error(`HTTP ${pollResponse.status}: ${await pollResponse.text()}`);
+        }
+        job = await pollResponse.json();
+        addDebugLog(`🔄 Job ${job.status}: ${job.partial_results.length} leads so far`);
+      }
+
+      addDebugLog(`📋 Job data: ${JSON.stringify(job.result, null, 2)}`);
       
-      if (result.success) {
-        addDebugLog(`✅ Extraction successful: ${result.message}`);
+      if (job.status === 'succeeded') {
+        const message = `Successfully extracted ${job.result.records_count} leads`;
+        addDebugLog(`✅ Extraction successful: ${message}`);
         setExtractionResult({
           success: true,
-          message: result.message,
-          data: result.data
+          message: message,
+          data: { ...job.result, download_url: job.download_url }
         });
       } else {
-        addDebugLog(`❌ Extraction failed: ${result.error}`);
+        addDebugLog(`❌ Extraction ${job.status}: ${job.error}`);
         setExtractionResult({
           success: false,
-          message: result.error || 'An error occurred during extraction'
+          message: job.error || `Extraction ${job.status}`
         });
       }
     } catch (error) {
@@ -265,7 +318,9 @@ Backend: ${API_BASE_URL}`;
   const handleDownloadCSV = () => {
     if (extractionResult?.data?.filename) {
       // Create download link for the CSV file
-      const downloadUrl = `${import.meta.env.VITE_API_URL || 'https://hkgrow-6vghzu7ui-thiens-projects-80bfe1b8.vercel.app'}/api/download/${extractionResult.data.filename.split('/').pop()}`;
+      // Prefer the content-addressed URL from the backend so repeat downloads hit the cache
+      const downloadPath = extractionResult.data.download_url || `/api/download/${extractionResult.data.filename.split('/').pop()}`;
+      const downloadUrl = `${import.meta.env.VITE_API_URL || 'https://hkgrow-6vghzu7ui-thiens-projects-80bfe1b8.vercel.app'}${downloadPath}`;
       
       // Create a temporary link and trigger download
       const link = document.createElement('a');